@@ -8,6 +8,7 @@ from sqlalchemy.orm import sessionmaker
 from config import Config
 import os
 from app.utils.timeago import time_ago
+from app.utils.db import RoutingSessionFactory, init_db_routing
 
 mail = Mail()
 login_manager = LoginManager()
@@ -22,9 +23,17 @@ def create_app():
     mail.init_app(app)
     login_manager.init_app(app)
 
+    # Primary (writes) + optional read replica (see app/utils/db.py)
     engine = create_engine(app.config["SQLALCHEMY_DATABASE_URI"], pool_pre_ping=True)
     SessionLocal = sessionmaker(bind=engine)
-    app.session = SessionLocal
+
+    ReplicaSession = None
+    if app.config.get("SQLALCHEMY_REPLICA_URI"):
+        replica_engine = create_engine(app.config["SQLALCHEMY_REPLICA_URI"], pool_pre_ping=True)
+        ReplicaSession = sessionmaker(bind=replica_engine)
+
+    app.session = RoutingSessionFactory(SessionLocal, ReplicaSession)
+    init_db_routing(app)
 
     from app.routes.auth_routes import auth_bp
     from app.routes.user_routes import user_bp
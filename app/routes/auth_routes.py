@@ -1,15 +1,15 @@
 from flask import Blueprint, render_template, request, redirect, url_for, current_app
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
-from flask_mail import Message
 from sqlalchemy import text
 from itsdangerous import URLSafeTimedSerializer, SignatureExpired, BadSignature
 
-from app import login_manager, mail
+from app import login_manager
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 
 from app.email_templates import verification_email_html, reset_password_email_html
+from app.utils.outbox import enqueue_email
 from models import User
 
 auth_bp = Blueprint("auth", __name__)
@@ -72,7 +72,11 @@ def logout():
 # ============================================================
 # SEND VERIFICATION EMAIL (SAFE)
 # ============================================================
-def send_verification_email(email):
+def send_verification_email(session, email):
+    """
+    Queues the verification email (delivered by the outbox sender).
+    Does NOT commit (caller controls transaction).
+    """
     serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
     token = serializer.dumps(email, salt="email-verify")
 
@@ -82,14 +86,13 @@ def send_verification_email(email):
         _external=True
     )
 
-    msg = Message(
-        subject="Verify Your Leaders.st Account",
-        recipients=[email],
+    enqueue_email(
+        session,
+        email,
+        "Verify Your Leaders.st Account",
         html=verification_email_html(verify_url)
     )
 
-    mail.send(msg)
-
 
 # ============================================================
 # VERIFY EMAIL
@@ -148,14 +151,16 @@ def forgot_password():
             _external=True
         )
 
-        msg = Message(
-            subject="Reset Your Leaders.st Password",
-            sender=current_app.config["MAIL_USERNAME"],
-            recipients=[email],
-            html=reset_password_email_html(reset_url)
+        session = current_app.session()
+        enqueue_email(
+            session,
+            email,
+            "Reset Your Leaders.st Password",
+            html=reset_password_email_html(reset_url),
+            sender=current_app.config["MAIL_USERNAME"]
         )
-
-        mail.send(msg)
+        session.commit()
+        session.close()
 
         return render_template(
             "forgot_password.html",
@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, current_app
 from flask_login import login_required, current_user
 from sqlalchemy import text
+from app.utils.db import read_only
 
 notification_bp = Blueprint(
     "notification",
@@ -13,6 +14,7 @@ notification_bp = Blueprint(
 # ============================================================
 @notification_bp.route("/unread", methods=["GET"])
 @login_required
+@read_only
 def unread_notifications():
     session = current_app.session()
 
@@ -107,6 +109,7 @@ def mark_single_read(notification_id):
 # ============================================================
 @notification_bp.route("/count", methods=["GET"])
 @login_required
+@read_only
 def unread_count():
     session = current_app.session()
 
@@ -129,6 +132,7 @@ def unread_count():
 # ============================================================
 @notification_bp.route("/all")
 @login_required
+@read_only
 def all_notifications():
     session = current_app.session()
 
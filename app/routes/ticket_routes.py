@@ -1,33 +1,69 @@
-from flask import Blueprint, render_template, request, current_app, redirect, url_for
+from flask import Blueprint, render_template, request, current_app, redirect, url_for, Response, stream_with_context, jsonify
 from flask_login import login_required
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from datetime import datetime
 from flask_login import current_user
-from app.utils.slack_notifier import notify_user
-import os
-from werkzeug.utils import secure_filename
+from app.utils.fanout import notify
+import io
+import csv
+import json
+import base64
 from app.utils.files import allowed_file
+from app.utils.attachments import store_attachment
 from datetime import datetime, timedelta
 from app.utils.ticket_activity import log_ticket_activity
+from app.utils.cache import dashboard_cache, dashboard_key, tickets_version, tickets_changed
+from app.utils.ticket_search import build_search
+from app.utils.sla import OVERDUE_SQL
+from app.utils.rollup import rollup_kpis, ticket_trends, MAX_TREND_DAYS
+from app.utils.db import read_only
+from app.utils.view_log import view_recorder
 
 ticket_bp = Blueprint("ticket", __name__)
 
+DASHBOARD_PAGE_SIZE = 50
+DESCRIPTION_PREVIEW_CHARS = 120
+NOTES_PAGE_SIZE = 30
+
 
 # ============================
-# DASHBOARD (Enhanced with Search + Filters + KPIs + Chart Data)
+# KEYSET CURSOR: (created_at, id) of the last row shown
 # ============================
-@ticket_bp.route("/", methods=["GET"])
-@login_required
-def dashboard():
-    session = current_app.session()
+def _encode_cursor(created_at, ticket_id):
+    raw = f"{created_at:%Y-%m-%d %H:%M:%S}|{ticket_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-    # -------------------------
-    # INPUTS
-    # -------------------------
-    search = request.args.get("search", "").strip()
-    filter_status = request.args.get("filter", "").strip()
-    my_only = request.args.get("my")
 
+def _decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        created_at, ticket_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S"), int(ticket_id)
+    except (ValueError, UnicodeDecodeError):
+        return None  # bad/stale cursor → first page
+
+
+# Ranked search results page by offset (relevance isn't a stable key)
+def _encode_offset(offset):
+    return f"r{offset}"
+
+
+def _decode_offset(cursor):
+    if cursor.startswith("r") and cursor[1:].isdigit():
+        return int(cursor[1:])
+    return 0
+
+
+# ============================
+# SHARED TICKET FILTERS (DASHBOARD + EXPORT)
+# ============================
+def _ticket_filters(search, filter_status, my_only):
+    """
+    Returns (where_clause, params, rank_sql) for the current user:
+    role visibility, search and the resolved/unresolved/overdue filter.
+    rank_sql is the relevance expression when search is FULLTEXT.
+    """
     params = {}
 
     # -------------------------
@@ -49,17 +85,13 @@ def dashboard():
         where_clause += " AND t.assigned_to = :agent_id"
 
     # -------------------------
-    # SEARCH
+    # SEARCH (FULLTEXT INDEX, RANKED)
     # -------------------------
+    rank_sql = None
     if search:
-        where_clause += """
-            AND (
-                t.ticket_code LIKE :s
-                OR t.email LIKE :s
-                OR t.description LIKE :s
-            )
-        """
-        params["s"] = f"%{search}%"
+        search_clause, search_params, rank_sql = build_search(search)
+        where_clause += search_clause
+        params.update(search_params)
 
     # -------------------------
     # FILTERS
@@ -71,36 +103,69 @@ def dashboard():
         where_clause += " AND t.status IN ('Open','In Progress')"
 
     elif filter_status == "overdue":
-        where_clause += """
-            AND t.status != 'Resolved'
-            AND (
-                (t.priority = 'High' AND t.created_at < NOW() - INTERVAL 24 HOUR)
-                OR (t.priority = 'Medium' AND t.created_at < NOW() - INTERVAL 48 HOUR)
-                OR (t.priority = 'Low' AND t.created_at < NOW() - INTERVAL 72 HOUR)
-            )
-        """
+        where_clause += f" AND {OVERDUE_SQL}"
+
+    return where_clause, params, rank_sql
+
+
+# ============================
+# DASHBOARD (Enhanced with Search + Filters + KPIs + Chart Data)
+# ============================
+@ticket_bp.route("/", methods=["GET"])
+@login_required
+@read_only
+def dashboard():
+    session = current_app.session()
 
     # -------------------------
-    # FETCH TICKETS + SLA DATA
+    # INPUTS
     # -------------------------
-    tickets = session.execute(
-        text(f"""
-            SELECT
-                t.*,
-                u.email AS agent_email,
-                TIMESTAMPDIFF(HOUR, t.created_at, NOW()) AS elapsed_hours,
-                CASE
-                    WHEN t.priority = 'High' THEN 24
-                    WHEN t.priority = 'Medium' THEN 48
-                    ELSE 72
-                END AS sla_hours
-            FROM tickets t
-            LEFT JOIN users u ON t.assigned_to = u.id
-            {where_clause}
-            ORDER BY t.created_at DESC
-        """),
-        params
-    ).fetchall()
+    search = request.args.get("search", "").strip()
+    filter_status = request.args.get("filter", "").strip()
+    my_only = request.args.get("my")
+
+    where_clause, params, rank_sql = _ticket_filters(search, filter_status, my_only)
+
+    # -------------------------
+    # FETCH ONE PAGE OF TICKETS + SLA DATA
+    # - newest first, keyset on (created_at, id)
+    # - search results: best match first, paged by offset
+    # -------------------------
+    page_clause = ""
+    page_params = dict(params, limit=DASHBOARD_PAGE_SIZE + 1)
+    raw_cursor = request.args.get("cursor", "")
+
+    if rank_sql:
+        offset = _decode_offset(raw_cursor)
+        order_clause = "ORDER BY relevance DESC, t.id DESC LIMIT :limit OFFSET :offset"
+        page_params["offset"] = offset
+    else:
+        order_clause = "ORDER BY t.created_at DESC, t.id DESC LIMIT :limit"
+
+        cursor = _decode_cursor(raw_cursor)
+        if cursor:
+            page_clause = """
+                AND (
+                    t.created_at < :cursor_at
+                    OR (t.created_at = :cursor_at AND t.id < :cursor_id)
+                )
+            """
+            page_params["cursor_at"], page_params["cursor_id"] = cursor
+
+    # -------------------------
+    # CACHED RESULTS FOR THIS VIEW (SEE app/utils/cache.py)
+    # -------------------------
+    cache = dashboard_cache()
+    scope = "admin" if current_user.role == "admin" else f"agent:{current_user.id}"
+    version = tickets_version(session)
+    page_key = dashboard_key(version, "page", scope, filter_status, search, raw_cursor)
+    kpi_key = dashboard_key(version, "kpis", scope, filter_status, search)
+
+    page = cache.get(page_key)
+    if page is None:
+        page = _load_page(session, where_clause, page_clause, order_clause, page_params, rank_sql)
+        cache.set(page_key, page)
+    tickets, next_cursor = page
 
     # -------------------------
     # NOTIFIES USERS
@@ -115,83 +180,366 @@ def dashboard():
     ).fetchall()
 
     # -------------------------
-    # KPI METRICS (CONSISTENT)
+    # KPI METRICS (ONE PASS, CACHED PER SCOPE)
     # -------------------------
-    total = session.execute(
-        text(f"SELECT COUNT(*) FROM tickets t {where_clause}"),
-        params
-    ).scalar()
+    kpis = cache.get(kpi_key)
+    if kpis is None and not (search or filter_status):
+        # Unfiltered view: totals from the daily rollup, overdue via index
+        kpis = rollup_kpis(session, params.get("agent_id"))
+        kpis["overdue"] = session.execute(
+            text(f"SELECT COUNT(*) FROM tickets t {where_clause} AND {OVERDUE_SQL}"),
+            params
+        ).scalar()
+        cache.set(kpi_key, kpis)
+
+    elif kpis is None:
+        kpis = dict(session.execute(
+            text(f"""
+                SELECT
+                    COUNT(*) AS total,
+                    COALESCE(SUM(t.status IN ('Open','In Progress')), 0) AS unresolved,
+                    COALESCE(SUM(t.status = 'Resolved'), 0) AS resolved,
+                    COALESCE(SUM({OVERDUE_SQL}), 0) AS overdue,
+                    COALESCE(SUM(t.priority = 'High'), 0) AS high,
+                    COALESCE(SUM(t.priority = 'Medium'), 0) AS medium,
+                    COALESCE(SUM(t.priority = 'Low'), 0) AS low
+                FROM tickets t
+                {where_clause}
+            """),
+            params
+        ).fetchone()._mapping)
+        cache.set(kpi_key, kpis)
 
-    unresolved = session.execute(
-        text(f"""
-            SELECT COUNT(*) FROM tickets t
-            {where_clause} AND t.status IN ('Open','In Progress')
-        """),
-        params
-    ).scalar()
+    session.close()
+
+    return render_template(
+        "dashboard.html",
+        notifications=notifications,
+        tickets=tickets,
+        total=kpis["total"],
+        unresolved=kpis["unresolved"],
+        resolved=kpis["resolved"],
+        overdue=kpis["overdue"],
+        high=kpis["high"],
+        medium=kpis["medium"],
+        low=kpis["low"],
+        search=search,
+        filter_status=filter_status,
+        my_only=my_only,
+        cursor=raw_cursor,
+        next_cursor=next_cursor
+    )
 
-    resolved = session.execute(
-        text(f"""
-            SELECT COUNT(*) FROM tickets t
-            {where_clause} AND t.status = 'Resolved'
-        """),
-        params
-    ).scalar()
 
-    overdue = session.execute(
+def _load_page(session, where_clause, page_clause, order_clause, page_params, rank_sql):
+    """
+    One page of tickets + the cursor of the next one.
+    Rows become plain dicts so any cache backend can store them.
+    """
+    tickets = session.execute(
         text(f"""
-            SELECT COUNT(*) FROM tickets t
+            SELECT
+                t.id,
+                t.ticket_code,
+                t.email,
+                LEFT(t.description, {DESCRIPTION_PREVIEW_CHARS}) AS description,
+                t.status,
+                t.priority,
+                t.assigned_to,
+                t.created_at,
+                t.updated_at,
+                u.email AS agent_email,
+                TIMESTAMPDIFF(HOUR, t.created_at, NOW()) AS elapsed_hours,
+                t.sla_hours
+                {f", {rank_sql} AS relevance" if rank_sql else ""}
+            FROM tickets t
+            LEFT JOIN users u ON t.assigned_to = u.id
             {where_clause}
-            AND t.status != 'Resolved'
-            AND (
-                (t.priority = 'High' AND t.created_at < NOW() - INTERVAL 24 HOUR)
-                OR (t.priority = 'Medium' AND t.created_at < NOW() - INTERVAL 48 HOUR)
-                OR (t.priority = 'Low' AND t.created_at < NOW() - INTERVAL 72 HOUR)
-            )
+            {page_clause}
+            {order_clause}
         """),
-        params
-    ).scalar()
+        page_params
+    ).fetchall()
 
-    # -------------------------
-    # PRIORITY COUNTS
-    # -------------------------
-    high = session.execute(
-        text(f"SELECT COUNT(*) FROM tickets t {where_clause} AND t.priority = 'High'"),
-        params
-    ).scalar()
+    next_cursor = None
+    if len(tickets) > DASHBOARD_PAGE_SIZE:
+        tickets = tickets[:DASHBOARD_PAGE_SIZE]
+        if rank_sql:
+            next_cursor = _encode_offset(page_params["offset"] + DASHBOARD_PAGE_SIZE)
+        else:
+            next_cursor = _encode_cursor(tickets[-1].created_at, tickets[-1].id)
 
-    medium = session.execute(
-        text(f"SELECT COUNT(*) FROM tickets t {where_clause} AND t.priority = 'Medium'"),
-        params
-    ).scalar()
+    return [dict(t._mapping) for t in tickets], next_cursor
 
-    low = session.execute(
-        text(f"SELECT COUNT(*) FROM tickets t {where_clause} AND t.priority = 'Low'"),
-        params
-    ).scalar()
 
-    session.close()
+# ============================
+# EXPORT (STREAMED CSV / NDJSON, SAME FILTERS AS DASHBOARD)
+# ============================
+EXPORT_COLUMNS = (
+    "id", "ticket_code", "email", "status", "priority", "agent_email",
+    "sla_hours", "due_at", "created_at", "updated_at", "description"
+)
+EXPORT_FETCH_ROWS = 1000
 
-    return render_template(
-        "dashboard.html",
-        notifications=notifications,
-        tickets=tickets,
-        total=total,
-        unresolved=unresolved,
-        resolved=resolved,
-        overdue=overdue,
-        high=high,
-        medium=medium,
-        low=low,
-        search=search,
-        filter_status=filter_status
+
+@ticket_bp.route("/tickets/export", methods=["GET"])
+@login_required
+@read_only
+def export_tickets():
+    """
+    /tickets/export?format=csv|ndjson&search=...&filter=...&my=1
+    Rows come off a server-side cursor and are written as they arrive,
+    so memory stays flat whatever the result size.
+    """
+    fmt = request.args.get("format", "csv").lower()
+    if fmt not in ("csv", "ndjson"):
+        return "Unsupported format (csv or ndjson)", 400
+
+    search = request.args.get("search", "").strip()
+    filter_status = request.args.get("filter", "").strip()
+    my_only = request.args.get("my")
+
+    where_clause, params, _ = _ticket_filters(search, filter_status, my_only)
+
+    def generate():
+        session = current_app.session()
+        try:
+            result = session.execute(
+                text(f"""
+                    SELECT
+                        t.id,
+                        t.ticket_code,
+                        t.email,
+                        t.status,
+                        t.priority,
+                        u.email AS agent_email,
+                        t.sla_hours,
+                        t.due_at,
+                        t.created_at,
+                        t.updated_at,
+                        t.description
+                    FROM tickets t
+                    LEFT JOIN users u ON t.assigned_to = u.id
+                    {where_clause}
+                    ORDER BY t.id
+                """),
+                params,
+                execution_options={"stream_results": True, "yield_per": EXPORT_FETCH_ROWS}
+            )
+
+            if fmt == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerow(EXPORT_COLUMNS)
+
+                for rows in result.partitions():
+                    writer.writerows(rows)
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+
+                yield buffer.getvalue()
+            else:
+                for rows in result.partitions():
+                    yield "".join(
+                        json.dumps(dict(r._mapping), default=str) + "\n"
+                        for r in rows
+                    )
+        finally:
+            session.close()
+
+    stamp = datetime.now().strftime("%Y%m%d-%H%M")
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/csv" if fmt == "csv" else "application/x-ndjson",
+        headers={
+            "Content-Disposition": f"attachment; filename=tickets-{stamp}.{fmt}"
+        }
     )
 
+# ============================
+# TRENDS (DAILY ROLLUP → JSON FOR CHARTS)
+# ============================
+@ticket_bp.route("/tickets/trends", methods=["GET"])
+@login_required
+@read_only
+def ticket_trend_data():
+    """
+    /tickets/trends?days=90
+    Admins see every agent; agents only their own tickets.
+    """
+    days = request.args.get("days", 90, type=int)
+    days = max(1, min(days, MAX_TREND_DAYS))
+    agent_id = current_user.id if current_user.role == "agent" else None
+
+    session = current_app.session()
+    try:
+        return jsonify(ticket_trends(session, days, agent_id))
+    finally:
+        session.close()
+
+
+# ============================
+# BULK UPDATE (ADMIN TRIAGE)
+# ============================
+TICKET_STATUSES = ("Open", "In Progress", "Resolved")
+TICKET_PRIORITIES = ("High", "Medium", "Low")
+BULK_MAX_TICKETS = 500
+
+# Placeholders only, so PyMySQL's executemany sends ONE multi-row INSERT
+# (checked by migrate.py --check-plans, see query_plans.BATCHED_INSERTS)
+BULK_ACTIVITY_SQL = """
+    INSERT INTO ticket_notes (ticket_id, user_id, note, is_system)
+    VALUES (:ticket_id, :user_id, :note, :is_system)
+"""
+
+
+@ticket_bp.route("/tickets/bulk", methods=["POST"])
+@login_required
+def bulk_update_tickets():
+    """
+    JSON: {"ids": [1, 2, 3], "status": "Resolved", "priority": "High",
+           "assigned_to": 7}   (any of the three; assigned_to null = unassign)
+
+    One transaction: ONE set-based UPDATE, one multi-row activity insert,
+    one multi-row notification insert per audience.
+    Returns {"results": {"<id>": "updated" | "unchanged" | "not_found"}}.
+    """
+    if current_user.role != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    data = request.get_json(silent=True) or {}
+
+    try:
+        ids = sorted({int(i) for i in data.get("ids") or []})
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids must be integers"}), 400
+
+    if not ids or len(ids) > BULK_MAX_TICKETS:
+        return jsonify({"error": f"Select between 1 and {BULK_MAX_TICKETS} tickets"}), 400
+
+    changes = {}
+    if "status" in data:
+        if data["status"] not in TICKET_STATUSES:
+            return jsonify({"error": "Invalid status"}), 400
+        changes["status"] = data["status"]
+
+    if "priority" in data:
+        if data["priority"] not in TICKET_PRIORITIES:
+            return jsonify({"error": "Invalid priority"}), 400
+        changes["priority"] = data["priority"]
+
+    session = current_app.session()
+
+    try:
+        if "assigned_to" in data:
+            assigned = data["assigned_to"]
+            if assigned not in (None, ""):
+                agent = session.execute(
+                    text("SELECT id, email FROM users WHERE id = :id AND role = 'agent'"),
+                    {"id": assigned}
+                ).fetchone()
+                if not agent:
+                    return jsonify({"error": "assigned_to must be an agent id"}), 400
+                assigned = agent.id
+            changes["assigned_to"] = assigned or None
+
+        if not changes:
+            return jsonify({"error": "Nothing to change"}), 400
+
+        # -------------------------
+        # LOCK + DIFF
+        # -------------------------
+        tickets = session.execute(
+            text("""
+                SELECT id, ticket_code, status, priority, assigned_to
+                FROM tickets
+                WHERE id IN :ids
+                FOR UPDATE
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"ids": ids}
+        ).fetchall()
+
+        results = {str(i): "not_found" for i in ids}
+        codes = {t.id: (t.id, t.ticket_code) for t in tickets}
+        activity = []
+        changed_ids = []
+        newly_assigned = []
+
+        for t in tickets:
+            messages = []
+            if "status" in changes and t.status != changes["status"]:
+                messages.append(f"🔄 {current_user.email} changed status from {t.status} to {changes['status']}")
+            if "priority" in changes and t.priority != changes["priority"]:
+                messages.append(f"⚡ {current_user.email} changed priority from {t.priority} to {changes['priority']}")
+            if "assigned_to" in changes and t.assigned_to != changes["assigned_to"]:
+                messages.append(f"👤 {current_user.email} reassigned this ticket")
+                if changes["assigned_to"]:
+                    newly_assigned.append(t.id)
+
+            if not messages:
+                results[str(t.id)] = "unchanged"
+                continue
+
+            results[str(t.id)] = "updated"
+            changed_ids.append(t.id)
+            activity.extend(
+                {"ticket_id": t.id, "user_id": current_user.id, "note": m, "is_system": 1}
+                for m in messages
+            )
+
+        if not changed_ids:
+            session.rollback()
+            return jsonify({"results": results})
+
+        # -------------------------
+        # ONE UPDATE FOR ALL TICKETS
+        # -------------------------
+        assignments = ", ".join(f"{col} = :{col}" for col in changes)
+        session.execute(
+            text(f"""
+                UPDATE tickets
+                SET {assignments}, updated_at = NOW()
+                WHERE id IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {**changes, "ids": changed_ids}
+        )
+
+        # -------------------------
+        # 📝 ACTIVITY (ONE MULTI-ROW INSERT)
+        # -------------------------
+        session.execute(text(BULK_ACTIVITY_SQL), activity)
+
+        # -------------------------
+        # 🔔 NOTIFICATIONS (ONE MULTI-ROW INSERT EACH)
+        # -------------------------
+        notify(session, "admin", [codes[i] for i in changed_ids], "Ticket {code} updated")
+
+        if newly_assigned:
+            notify(
+                session, [changes["assigned_to"]], [codes[i] for i in newly_assigned],
+                "You have been assigned ticket {code}"
+            )
+
+        session.commit()
+        tickets_changed(session)
+
+        return jsonify({"results": results})
+
+    except Exception:
+        session.rollback()
+        raise
+
+    finally:
+        session.close()
+
+
 # ============================
 # SINGLE TICKET PAGE
 # ============================
 @ticket_bp.route("/ticket/<int:id>", methods=["GET", "POST"])
 @login_required
+@read_only
 def view_ticket(id):
     session = current_app.session()
 
@@ -213,14 +561,10 @@ def view_ticket(id):
         return "Ticket not found", 404
 
     # ============================
-    # 👣 LOG VIEW ACTIVITY (EVERY TIME)
+    # 👣 LOG VIEW ACTIVITY (BUFFERED, ONCE PER USER PER WINDOW)
     # ============================
-    log_ticket_activity(
-        session,
-        id,
-        f"👀 {current_user.email} viewed this ticket"
-    )
-    session.commit()
+    if request.method == "GET":
+        view_recorder.record(current_user.id, current_user.email, id)
 
     # ============================
     # HANDLE POST
@@ -248,29 +592,10 @@ def view_ticket(id):
                 )
                 note_id = result.lastrowid
 
-                relative_dir = os.path.join(
-                    "uploads", "tickets", f"ticket_{id}", f"note_{note_id}"
-                )
-                upload_dir = os.path.join(current_app.static_folder, relative_dir)
-                os.makedirs(upload_dir, exist_ok=True)
-
+                # Content-addressed: identical images are stored once
                 for file in files:
                     if file and allowed_file(file.filename):
-                        filename = secure_filename(file.filename)
-                        file.save(os.path.join(upload_dir, filename))
-
-                        session.execute(
-                            text("""
-                                INSERT INTO note_attachments
-                                (note_id, file_path, file_type)
-                                VALUES (:note_id, :file_path, :file_type)
-                            """),
-                            {
-                                "note_id": note_id,
-                                "file_path": f"{relative_dir}/{filename}",
-                                "file_type": file.mimetype
-                            }
-                        )
+                        store_attachment(session, note_id, file)
 
                 session.commit()
             session.close()
@@ -347,29 +672,16 @@ def view_ticket(id):
         # ============================
         # 🔔 NOTIFICATIONS
         # ============================
-        admins = session.execute(
-            text("SELECT id FROM users WHERE role = 'admin'")
-        ).fetchall()
-
-        for admin in admins:
-            notify_user(
-                session,
-                admin.id,
-                id,
-                ticket.ticket_code,
-                f"Ticket {ticket.ticket_code} updated"
-            )
+        notify(session, "admin", [(id, ticket.ticket_code)], "Ticket {code} updated")
 
         if new_assigned:
-            notify_user(
-                session,
-                int(new_assigned),
-                id,
-                ticket.ticket_code,
-                f"You have been assigned ticket {ticket.ticket_code}"
+            notify(
+                session, [new_assigned], [(id, ticket.ticket_code)],
+                "You have been assigned ticket {code}"
             )
 
         session.commit()
+        tickets_changed(session)
         session.close()
         return redirect(url_for("ticket.view_ticket", id=id))
 
@@ -383,33 +695,14 @@ def view_ticket(id):
         ).fetchall()
 
     # ============================
-    # LOAD NOTES + IMAGES
+    # LOAD ONE PAGE OF NOTES + IMAGES (ONE QUERY)
     # ============================
-    notes = session.execute(
-        text("""
-            SELECT n.id, n.note, n.created_at, u.email, u.role
-            FROM ticket_notes n
-            JOIN users u ON n.user_id = u.id
-            WHERE n.ticket_id = :tid
-            ORDER BY n.created_at DESC
-        """),
-        {"tid": id}
-    ).fetchall()
+    hide_system = request.args.get("hide_system") == "1"
+    notes_cursor = request.args.get("notes_cursor", "")
 
-    attachments = session.execute(
-        text("""
-            SELECT note_id, file_path
-            FROM note_attachments
-            WHERE note_id IN (
-                SELECT id FROM ticket_notes WHERE ticket_id = :tid
-            )
-        """),
-        {"tid": id}
-    ).fetchall()
-
-    images_by_note = {}
-    for a in attachments:
-        images_by_note.setdefault(a.note_id, []).append(a.file_path)
+    notes, images_by_note, next_notes_cursor = _load_notes_page(
+        session, id, _decode_cursor(notes_cursor), hide_system
+    )
 
     session.close()
 
@@ -418,7 +711,66 @@ def view_ticket(id):
         ticket=ticket,
         agents=agents,
         notes=notes,
-        images_by_note=images_by_note
+        images_by_note=images_by_note,
+        hide_system=hide_system,
+        notes_cursor=notes_cursor,
+        next_notes_cursor=next_notes_cursor
     )
 
 
+def _load_notes_page(session, ticket_id, cursor, hide_system):
+    """
+    Newest-first notes page, keyset on (created_at, id), with each
+    note's attachments LEFT JOINed in the same round trip.
+    Returns (notes, images_by_note, next_cursor).
+    """
+    filters = ""
+    params = {"tid": ticket_id, "limit": NOTES_PAGE_SIZE + 1}
+
+    if hide_system:
+        filters += " AND is_system = 0"
+
+    if cursor:
+        filters += """
+            AND (
+                created_at < :cursor_at
+                OR (created_at = :cursor_at AND id < :cursor_id)
+            )
+        """
+        params["cursor_at"], params["cursor_id"] = cursor
+
+    rows = session.execute(
+        text(f"""
+            SELECT n.id, n.note, n.is_system, n.created_at,
+                   u.email, u.role, a.file_path
+            FROM (
+                SELECT id, user_id, note, is_system, created_at
+                FROM ticket_notes
+                WHERE ticket_id = :tid
+                {filters}
+                ORDER BY created_at DESC, id DESC
+                LIMIT :limit
+            ) n
+            JOIN users u ON n.user_id = u.id
+            LEFT JOIN note_attachments a ON a.note_id = n.id
+            ORDER BY n.created_at DESC, n.id DESC, a.id
+        """),
+        params
+    ).fetchall()
+
+    notes = []
+    images_by_note = {}
+    for r in rows:
+        if not notes or notes[-1].id != r.id:
+            notes.append(r)
+        if r.file_path:
+            images_by_note.setdefault(r.id, []).append({"file_path": r.file_path})
+
+    next_cursor = None
+    if len(notes) > NOTES_PAGE_SIZE:
+        notes = notes[:NOTES_PAGE_SIZE]
+        next_cursor = _encode_cursor(notes[-1].created_at, notes[-1].id)
+
+    return notes, images_by_note, next_cursor
+
+
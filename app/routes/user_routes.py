@@ -4,10 +4,8 @@ from werkzeug.security import generate_password_hash
 from sqlalchemy import text
 from sqlalchemy.exc import IntegrityError
 from itsdangerous import URLSafeTimedSerializer
-from flask_mail import Message
 from app.email_templates import verification_email_html
-
-from app import mail
+from app.utils.outbox import enqueue_email
 
 user_bp = Blueprint("user", __name__, url_prefix="/user")
 
@@ -59,21 +57,10 @@ def create_user():
                     "role": role
                 }
             )
-            session.commit()
-        except IntegrityError:
-            session.rollback()
-            session.close()
-            return render_template(
-                "create_user.html",
-                error="A user with this email already exists."
-            )
-
-        session.close()
 
-        # ============================
-        # SEND VERIFICATION EMAIL
-        # ============================
-        try:
+            # ============================
+            # QUEUE VERIFICATION EMAIL (SAME TRANSACTION)
+            # ============================
             serializer = URLSafeTimedSerializer(current_app.config["SECRET_KEY"])
             token = serializer.dumps(email, salt="email-verify")
 
@@ -83,18 +70,24 @@ def create_user():
                 _external=True
             )
 
-            msg = Message(
-                subject="Verify Your Leaders Account",
-                recipients=[email],
+            enqueue_email(
+                session,
+                email,
+                "Verify Your Leaders Account",
                 html=verification_email_html(verify_url)
             )
 
-            mail.send(msg)
-            print("📨 Verification email sent to:", email)
+            session.commit()
+            print("📨 Verification email queued for:", email)
+        except IntegrityError:
+            session.rollback()
+            session.close()
+            return render_template(
+                "create_user.html",
+                error="A user with this email already exists."
+            )
 
-        except Exception as e:
-            # Email failure should NEVER block user creation
-            print("⚠️ Verification email failed:", e)
+        session.close()
 
         return redirect(url_for("ticket.dashboard"))
 
@@ -0,0 +1,80 @@
+import threading
+from sqlalchemy import text
+from app.utils.versions import get_version
+
+
+_END = object()
+
+
+# ============================================================
+# COMPILED MATCHER
+# ============================================================
+def _build_trie(domains):
+    """
+    Reversed-label trie: "kplitigators.com" -> {"com": {"kplitigators": {END}}}
+    so "mail.kplitigators.com" matches by walking com → kplitigators.
+    """
+    trie = {}
+    for domain in domains:
+        node = trie
+        for label in reversed(domain.strip(".").split(".")):
+            node = node.setdefault(label, {})
+        node[_END] = True
+    return trie
+
+
+class SenderAllowlist:
+    """
+    In-process copy of the sender_allowlist table.
+    - Exact emails: hash set
+    - Domains: reversed-label trie (suffix match, O(label count))
+    Reloads when the 'sender_allowlist' version counter moves.
+    """
+
+    VERSION_NAME = "sender_allowlist"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._compiled = (frozenset(), {})
+
+    def refresh(self, session):
+        version = get_version(session, self.VERSION_NAME)
+        if version == self._version:
+            return False
+
+        with self._lock:
+            if version == self._version:
+                return False
+
+            rows = session.execute(
+                text("SELECT kind, value FROM sender_allowlist")
+            ).fetchall()
+
+            emails = frozenset(r.value.lower().strip() for r in rows if r.kind == "email")
+            domains = [r.value.lower().strip() for r in rows if r.kind == "domain"]
+
+            self._compiled = (emails, _build_trie(domains))
+            self._version = version
+
+        print(f"🔐 Sender allowlist loaded: {len(emails)} email(s), {len(domains)} domain(s)")
+        return True
+
+    def allows(self, sender):
+        emails, trie = self._compiled
+
+        if sender in emails:
+            return True
+
+        node = trie
+        for label in reversed(sender.rpartition("@")[2].split(".")):
+            node = node.get(label)
+            if node is None:
+                return False
+            if _END in node:
+                return True
+
+        return False
+
+
+sender_allowlist = SenderAllowlist()
@@ -0,0 +1,158 @@
+import hashlib
+import os
+import tempfile
+from flask import current_app
+from sqlalchemy import event, text
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+# ============================================================
+# CONTENT-ADDRESSED ATTACHMENT STORE
+# ============================================================
+# Every upload is stored once, under its sha256:
+#   static/<UPLOAD_FOLDER>/blobs/ab/cd/abcd…ef.png
+# attachment_blobs keeps one row per stored file; the notes using it
+# are note_attachments rows with the same content_hash (indexed). No
+# reference counter: notes/tickets are deleted by FK cascades, which
+# fire no triggers, so it could only drift. Two levels of 2-hex-char
+# shards keep every directory small (65 536 leaves).
+# A new file only reaches its final path once the transaction that
+# references it commits; a rollback deletes the spooled copy.
+
+def blob_path(content_hash, ext):
+    """Path relative to the static folder (what note_attachments stores)."""
+    return "/".join((
+        current_app.config.get("UPLOAD_FOLDER", "uploads"),
+        "blobs",
+        content_hash[:2],
+        content_hash[2:4],
+        f"{content_hash}.{ext}"
+    ))
+
+
+def _spool(file, directory):
+    """
+    Streams the upload into a temp file in `directory`, hashing as it
+    goes (the file is read exactly once). Returns (temp path, sha256 hex, size).
+    """
+    digest = hashlib.sha256()
+    size = 0
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    return tmp_path, digest.hexdigest(), size
+
+
+def _publish_blobs(session):
+    # after_commit: the rows are durable, move the files into place
+    for tmp_path, target in session.info.pop("pending_blobs", []):
+        try:
+            if os.path.exists(target):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                # Atomic: concurrent uploads of the same content just
+                # replace identical bytes
+                os.replace(tmp_path, target)
+        except OSError as e:
+            print(f"❌ Could not store attachment {target}:", e)
+
+
+def _discard_blobs(session, transaction):
+    # Rollback, or closed without commit: nothing references these
+    if transaction.parent is not None:
+        return
+    for tmp_path, _ in session.info.pop("pending_blobs", []):
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+
+def _pending_blobs(session):
+    if "pending_blobs" not in session.info:
+        if not event.contains(session, "after_commit", _publish_blobs):
+            event.listen(session, "after_commit", _publish_blobs)
+            event.listen(session, "after_transaction_end", _discard_blobs)
+        session.info["pending_blobs"] = []
+    return session.info["pending_blobs"]
+
+
+def store_attachment(session, note_id, file):
+    """
+    Saves an uploaded FileStorage for a note.
+    - Identical content is written to disk only once
+    - The file is moved to its final path when the caller commits,
+      and deleted if the transaction rolls back instead
+    Does NOT commit (caller controls transaction).
+    Returns the stored relative file path.
+    """
+    ext = file.filename.rsplit(".", 1)[1].lower()
+
+    blobs_dir = os.path.join(
+        current_app.static_folder,
+        current_app.config.get("UPLOAD_FOLDER", "uploads"),
+        "blobs"
+    )
+    os.makedirs(blobs_dir, exist_ok=True)
+
+    tmp_path, content_hash, size = _spool(file, blobs_dir)
+
+    # Same bytes uploaded as .jpg and .jpeg → keep the first stored copy
+    try:
+        stored = session.execute(
+            text("SELECT file_path FROM attachment_blobs WHERE content_hash = :h"),
+            {"h": content_hash}
+        ).fetchone()
+    except Exception:
+        os.remove(tmp_path)
+        raise
+
+    file_path = stored.file_path if stored else blob_path(content_hash, ext)
+    _pending_blobs(session).append(
+        (tmp_path, os.path.join(current_app.static_folder, file_path))
+    )
+
+    if not stored:
+        # A concurrent upload of the same bytes may have won the race
+        session.execute(
+            text("""
+                INSERT INTO attachment_blobs
+                (content_hash, file_path, file_type, size_bytes)
+                VALUES (:content_hash, :file_path, :file_type, :size_bytes)
+                ON DUPLICATE KEY UPDATE content_hash = content_hash
+            """),
+            {
+                "content_hash": content_hash,
+                "file_path": file_path,
+                "file_type": file.mimetype,
+                "size_bytes": size
+            }
+        )
+
+    session.execute(
+        text("""
+            INSERT INTO note_attachments
+            (note_id, content_hash, file_path, file_type)
+            VALUES (:note_id, :content_hash, :file_path, :file_type)
+        """),
+        {
+            "note_id": note_id,
+            "content_hash": content_hash,
+            "file_path": file_path,
+            "file_type": file.mimetype
+        }
+    )
+
+    return file_path
@@ -0,0 +1,176 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+from app.utils.versions import get_version, bump_version
+
+
+# ============================================================
+# IN-PROCESS LRU CACHE (DEFAULT BACKEND)
+# ============================================================
+class LRUCache:
+    """
+    Thread-safe LRU with per-entry expiry.
+    Values are per worker process (each gunicorn worker has its own).
+    """
+
+    def __init__(self, ttl_seconds, max_entries=1024):
+        self.ttl = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# ============================================================
+# SHARED REDIS CACHE (MULTI-WORKER GUNICORN)
+# ============================================================
+class RedisCache:
+    """
+    Same interface as LRUCache, shared by every worker.
+    Needs the optional `redis` package; eviction is left to Redis
+    (set maxmemory-policy allkeys-lru on the instance).
+    """
+
+    def __init__(self, url, ttl_seconds, prefix="leaders:cache:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("DASHBOARD_CACHE_URL is a redis:// URL but the redis package is not installed")
+
+        self.ttl = ttl_seconds
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        try:
+            raw = self._client.get(self.prefix + key)
+        except Exception as e:
+            print("❌ Cache read failed:", e)
+            return None
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value):
+        try:
+            self._client.setex(self.prefix + key, self.ttl, pickle.dumps(value))
+        except Exception as e:
+            print("❌ Cache write failed:", e)
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+
+# ============================================================
+# NO-OP CACHE (QUERY PLAN CHECKS)
+# ============================================================
+class NullCache:
+    """
+    Same interface, stores nothing: every lookup misses.
+    """
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def clear(self):
+        pass
+
+
+def make_cache(url, ttl_seconds, max_entries=1024):
+    """
+    url = None           → in-process LRU
+    url = "redis://..."  → shared Redis
+    """
+    if url and url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCache(url, ttl_seconds)
+    return LRUCache(ttl_seconds, max_entries)
+
+
+# ============================================================
+# DASHBOARD RESULTS (KPIs + TICKET PAGES)
+# ============================================================
+# Keys embed the 'tickets' version counter, so any ticket write bumps
+# the version and every cached result becomes unreachable at once (in
+# every worker and across backends). The TTL only bounds how stale the
+# time-based bits (elapsed hours, overdue) can get.
+TICKETS_VERSION = "tickets"
+
+_dashboard_cache = None
+_dashboard_cache_lock = threading.Lock()
+
+
+def dashboard_cache():
+    global _dashboard_cache
+    if _dashboard_cache is None:
+        with _dashboard_cache_lock:
+            if _dashboard_cache is None:
+                config = current_app.config
+                _dashboard_cache = make_cache(
+                    config.get("DASHBOARD_CACHE_URL"),
+                    config["DASHBOARD_CACHE_TTL_SECONDS"],
+                    config["DASHBOARD_CACHE_MAX_ENTRIES"]
+                )
+    return _dashboard_cache
+
+
+def disable_dashboard_cache():
+    """
+    Makes every later dashboard request read from the database
+    (whichever backend was configured or already in use).
+    """
+    global _dashboard_cache
+    with _dashboard_cache_lock:
+        _dashboard_cache = NullCache()
+
+
+def tickets_version(session):
+    return get_version(session, TICKETS_VERSION)
+
+
+def dashboard_key(version, *parts):
+    return repr((version, *parts))
+
+
+def tickets_changed(session):
+    """
+    Call right AFTER committing any ticket insert/update. The bump is
+    its own short transaction: inside the writer's transaction the one
+    config_versions('tickets') row lock would be held until that commit
+    and serialize every ticket writer (listener, bulk edits, SLA jobs).
+    Commits. A failed bump only leaves the dashboard cache stale until
+    its TTL.
+    """
+    try:
+        bump_version(session, TICKETS_VERSION)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        print("⚠️ Tickets version bump failed:", e)
@@ -0,0 +1,88 @@
+from sqlalchemy import text
+
+
+# Pre-database checkpoint of the original account's INBOX, read ONCE
+# to seed that mailbox's first row (other mailboxes never use it)
+LEGACY_UID_FILE = "last_uid.txt"
+
+
+def _legacy_last_uid():
+    try:
+        with open(LEGACY_UID_FILE, "r") as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return None
+
+
+# ============================================================
+# SAVE (NO COMMIT)
+# ============================================================
+def save_checkpoint(session, mailbox, uidvalidity, last_uid):
+    """
+    Advances the ingest checkpoint for a mailbox.
+    - Never moves backwards within the same UIDVALIDITY
+    - Does NOT commit: call it inside the transaction that
+      persisted the tickets the checkpoint covers
+    """
+    session.execute(
+        text("""
+            INSERT INTO ingest_checkpoints (mailbox, uidvalidity, last_uid)
+            VALUES (:mailbox, :uidvalidity, :last_uid)
+            ON DUPLICATE KEY UPDATE
+                last_uid = IF(
+                    uidvalidity = VALUES(uidvalidity),
+                    GREATEST(last_uid, VALUES(last_uid)),
+                    VALUES(last_uid)
+                ),
+                uidvalidity = VALUES(uidvalidity)
+        """),
+        {"mailbox": mailbox, "uidvalidity": uidvalidity, "last_uid": last_uid}
+    )
+
+
+# ============================================================
+# LOAD
+# ============================================================
+def load_checkpoint(session, mailbox, uidvalidity, uidnext, legacy_mailbox=False):
+    """
+    Returns the last ingested UID for (mailbox, uidvalidity).
+
+    A new mailbox starts at the current end (UIDNEXT - 1) instead of
+    turning its whole history into tickets. legacy_mailbox=True (the
+    original single account) seeds from last_uid.txt instead, so no
+    mail is skipped on upgrade.
+
+    When UIDVALIDITY changed, old UIDs are meaningless and mail that
+    arrived after the last checkpoint can't be told apart, so the folder
+    is rescanned from 0: header-only triage keeps that cheap and the
+    Message-ID dedupe drops everything already ingested.
+    """
+    row = session.execute(
+        text("""
+            SELECT uidvalidity, last_uid
+            FROM ingest_checkpoints
+            WHERE mailbox = :mailbox
+        """),
+        {"mailbox": mailbox}
+    ).fetchone()
+
+    if row and row.uidvalidity == uidvalidity:
+        session.rollback()  # end the read transaction
+        return row.last_uid
+
+    if row:
+        start = 0
+        print(
+            f"⚠️ UIDVALIDITY changed for {mailbox} "
+            f"({row.uidvalidity} → {uidvalidity}), rescanning from UID {start}"
+        )
+    else:
+        start = max(uidnext - 1, 0)
+        legacy = _legacy_last_uid() if legacy_mailbox else None
+        if legacy is not None:
+            start = min(legacy, start)
+        print(f"📌 New ingest checkpoint for {mailbox} at UID {start}")
+
+    save_checkpoint(session, mailbox, uidvalidity, start)
+    session.commit()
+    return start
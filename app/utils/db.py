@@ -0,0 +1,75 @@
+import time
+from flask import g, has_request_context, request, session as flask_session
+
+
+# Flask session key: until when this user's reads stay on the primary
+PRIMARY_UNTIL_KEY = "_db_primary_until"
+
+
+# ============================================================
+# READ / WRITE SPLIT SESSION FACTORY
+# ============================================================
+class RoutingSessionFactory:
+    """
+    Drop-in for the plain sessionmaker: app.session() → Session.
+    - Primary by default (anything that may write)
+    - Replica for @read_only views, and for callers outside a request
+      (jobs) that pass read_only=True
+    - A user who changed something in the last READ_YOUR_WRITES_SECONDS
+      stays on the primary, so they never read their own stale data
+    Without a replica URL every session is a primary session.
+    """
+
+    def __init__(self, primary, replica=None):
+        self.primary = primary
+        self.replica = replica
+
+    def __call__(self, read_only=None):
+        if read_only is None:
+            read_only = has_request_context() and g.get("db_read_only", False)
+
+        if read_only and self.replica is not None and not _recent_write():
+            return self.replica()
+
+        return self.primary()
+
+
+def _recent_write():
+    if not has_request_context():
+        return False
+    return flask_session.get(PRIMARY_UNTIL_KEY, 0) > time.time()
+
+
+def read_only(view):
+    """
+    Marks a view as read-only: its GET sessions (and the current_user
+    lookup) may be served by the replica. POSTs to the same view still
+    use the primary.
+    Put it under @login_required; the marker survives functools.wraps.
+    """
+    view.db_read_only = True
+    return view
+
+
+def init_db_routing(app):
+    """
+    Flags read-only requests BEFORE any session is opened (Flask-Login
+    loads the user before the view body runs) and opens the
+    read-your-writes window after successful writes.
+    """
+    if app.session.replica is None:
+        return
+
+    @app.before_request
+    def _route_reads():
+        view = app.view_functions.get(request.endpoint)
+        g.db_read_only = (
+            request.method in ("GET", "HEAD")
+            and getattr(view, "db_read_only", False)
+        )
+
+    @app.after_request
+    def _remember_writes(response):
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            flask_session[PRIMARY_UNTIL_KEY] = time.time() + app.config["READ_YOUR_WRITES_SECONDS"]
+        return response
@@ -0,0 +1,134 @@
+import threading
+from sqlalchemy import text, bindparam
+from app.utils.versions import get_version
+
+
+# ONE multi-row INSERT for every notification of a call (executemany)
+NOTIFICATIONS_SQL = """
+    INSERT INTO notifications (user_id, ticket_id, ticket_code, message)
+    VALUES (:user_id, :ticket_id, :ticket_code, :message)
+"""
+
+# Audience names → roles
+AUDIENCES = {
+    "admin": ("admin",),
+    "agent": ("agent",),
+    "staff": ("admin", "agent"),
+}
+
+
+# ============================================================
+# CACHED ROLE MEMBERSHIP
+# ============================================================
+class RoleDirectory:
+    """
+    In-process {role: (user ids)} copy of the users table.
+    Reloads when the 'users' version counter moves (bumped by the
+    trg_users_version_* triggers on insert / role change / delete).
+    """
+
+    VERSION_NAME = "users"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._members = {}
+
+    def refresh(self, session):
+        version = get_version(session, self.VERSION_NAME)
+        if version == self._version:
+            return False
+
+        with self._lock:
+            if version == self._version:
+                return False
+
+            members = {}
+            for r in session.execute(text("SELECT id, role FROM users ORDER BY id")):
+                members.setdefault(r.role, []).append(r.id)
+
+            self._members = {role: tuple(ids) for role, ids in members.items()}
+            self._version = version
+
+        return True
+
+    def members(self, session, audience):
+        self.refresh(session)
+        members = self._members
+        return [uid for role in AUDIENCES[audience] for uid in members.get(role, ())]
+
+
+role_directory = RoleDirectory()
+
+
+# ============================================================
+# FAN-OUT
+# ============================================================
+def notify(session, audience, tickets, message, dedupe=False):
+    """
+    Writes one in-app notification per (recipient, ticket).
+    - audience: "admin" | "agent" | "staff" or an iterable of user ids
+    - tickets:  [(ticket_id, ticket_code), ...]
+    - message:  text, "{code}" is replaced by each ticket's code
+    - dedupe:   skip recipients that already have the same UNREAD message
+    Does NOT commit (caller controls transaction).
+    Returns the number of notifications written.
+    """
+    if isinstance(audience, str):
+        user_ids = role_directory.members(session, audience)
+    else:
+        user_ids = sorted({int(u) for u in audience if u})
+
+    return notify_each(
+        session,
+        [(user_id, ticket_id, ticket_code) for ticket_id, ticket_code in tickets for user_id in user_ids],
+        message,
+        dedupe
+    )
+
+
+def notify_each(session, recipients, message, dedupe=False):
+    """
+    Same as notify() for per-ticket recipients:
+    recipients = [(user_id, ticket_id, ticket_code), ...]
+    All rows go out as ONE multi-row INSERT (+ one SELECT when dedupe).
+    """
+    rows = [
+        {
+            "user_id": user_id,
+            "ticket_id": ticket_id,
+            "ticket_code": ticket_code,
+            "message": message.replace("{code}", ticket_code),
+        }
+        for user_id, ticket_id, ticket_code in recipients
+    ]
+
+    if rows and dedupe:
+        existing = {
+            tuple(r) for r in session.execute(
+                text("""
+                    SELECT user_id, ticket_id, message
+                    FROM notifications
+                    WHERE user_id IN :user_ids
+                      AND ticket_id IN :ticket_ids
+                      AND is_read = 0
+                """).bindparams(
+                    bindparam("user_ids", expanding=True),
+                    bindparam("ticket_ids", expanding=True)
+                ),
+                {
+                    "user_ids": sorted({r["user_id"] for r in rows}),
+                    "ticket_ids": sorted({r["ticket_id"] for r in rows})
+                }
+            )
+        }
+        rows = [
+            r for r in rows
+            if (r["user_id"], r["ticket_id"], r["message"]) not in existing
+        ]
+
+    if not rows:
+        return 0
+
+    session.execute(text(NOTIFICATIONS_SQL), rows)
+    return len(rows)
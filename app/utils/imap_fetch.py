@@ -0,0 +1,255 @@
+import base64
+import binascii
+import codecs
+import quopri
+import re
+
+
+# ============================================================
+# UID SET
+# ============================================================
+def uid_set(uids):
+    """
+    Builds a compact IMAP sequence set from UIDs.
+    [1, 2, 3, 7, 9, 10] -> "1:3,7,9:10"
+    """
+    ranges = []
+    for uid in sorted({int(u) for u in uids}):
+        if ranges and uid == ranges[-1][1] + 1:
+            ranges[-1][1] = uid
+        else:
+            ranges.append([uid, uid])
+
+    return ",".join(
+        str(start) if start == end else f"{start}:{end}"
+        for start, end in ranges
+    )
+
+
+# ============================================================
+# FETCH RESPONSE TOKENIZER
+# ============================================================
+_OPEN = object()
+_CLOSE = object()
+
+_TOKEN_RE = re.compile(rb"""
+    \s*(?:
+        (?P<open>\()
+      | (?P<close>\))
+      | "(?P<quoted>(?:[^"\\]|\\.)*)"
+      | \{(?P<literal>\d+)\}\s*$
+      | (?P<atom>[^\s()"\[\]]+(?:\[[^\]]*\](?:<\d+>)?)?)
+    )""", re.X)
+
+
+def _scan(chunk, literal=None):
+    pos = 0
+    chunk = chunk.rstrip()
+
+    while pos < len(chunk):
+        m = _TOKEN_RE.match(chunk, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"Unparseable IMAP response near: {chunk[pos:pos + 40]!r}")
+        pos = m.end()
+
+        if m.group("open"):
+            yield _OPEN
+        elif m.group("close"):
+            yield _CLOSE
+        elif m.group("quoted") is not None:
+            yield re.sub(rb"\\(.)", rb"\1", m.group("quoted"))
+        elif m.group("literal") is not None:
+            yield literal if literal is not None else b""
+        else:
+            atom = m.group("atom")
+            yield None if atom.upper() == b"NIL" else atom
+
+
+def _tokens(data):
+    for item in data:
+        if isinstance(item, tuple):
+            head, literal = item
+            yield from _scan(head, literal)
+        elif item:
+            yield from _scan(item)
+
+
+def _read_list(tokens, pos):
+    items = []
+    while pos < len(tokens):
+        tok = tokens[pos]
+        pos += 1
+        if tok is _CLOSE:
+            return items, pos
+        if tok is _OPEN:
+            sub, pos = _read_list(tokens, pos)
+            items.append(sub)
+        else:
+            items.append(tok)
+    return items, pos
+
+
+def parse_fetch_response(data):
+    """
+    Parses the data returned by mail.uid("fetch", ...) into a list of
+    dicts, one per untagged FETCH response: {"UID": b"123", "RFC822": b"..."}.
+    Keys are upper-cased strings, values are bytes, None (NIL) or nested lists.
+    """
+    tokens = list(_tokens(data))
+    responses = []
+    pos = 0
+
+    while pos < len(tokens):
+        tok = tokens[pos]
+        pos += 1
+        if tok is not _OPEN:
+            continue  # sequence number
+
+        items, pos = _read_list(tokens, pos)
+        fields = {}
+        for i in range(0, len(items) - 1, 2):
+            key = items[i]
+            if isinstance(key, bytes):
+                fields[key.decode(errors="ignore").upper()] = items[i + 1]
+        responses.append(fields)
+
+    return responses
+
+
+# ============================================================
+# UID FETCH
+# ============================================================
+def uid_fetch(mail, uids, items):
+    """
+    Runs ONE UID FETCH for the whole UID set.
+    Returns {uid: {item: value}} for every message the server returned.
+    """
+    if not uids:
+        return {}
+
+    result, data = mail.uid("fetch", uid_set(uids), items)
+    if result != "OK":
+        raise RuntimeError(f"UID FETCH failed: {result} {data}")
+
+    messages = {}
+    for fields in parse_fetch_response(data):
+        uid = fields.get("UID")
+        if uid is None:
+            continue  # unsolicited FLAGS update
+        messages.setdefault(int(uid), {}).update(fields)
+
+    return messages
+
+
+def fetch_item(fields, prefix):
+    """
+    Returns the first fetch item whose name starts with prefix.
+    Servers echo section names back with their own spacing/partials,
+    e.g. BODY[1]<0> for BODY.PEEK[1]<0.4096>.
+    """
+    prefix = prefix.upper()
+    for key, value in fields.items():
+        if key.startswith(prefix):
+            return value
+    return None
+
+
+# ============================================================
+# BODYSTRUCTURE
+# ============================================================
+def _text(value):
+    if isinstance(value, bytes):
+        return value.decode(errors="ignore")
+    return ""
+
+
+def _params(value):
+    if not isinstance(value, list):
+        return {}
+    return {
+        _text(value[i]).lower(): _text(value[i + 1])
+        for i in range(0, len(value) - 1, 2)
+    }
+
+
+def find_text_part(structure):
+    """
+    Locates the body part to turn into ticket text.
+    - multipart: first text/plain part (depth-first, like msg.walk())
+    - single part: the body itself, whatever its type
+
+    Returns {"section", "encoding", "charset", "size"} or None.
+    """
+    if not isinstance(structure, list) or not structure:
+        return None
+
+    if not isinstance(structure[0], list):
+        return _part_info("1", structure)
+
+    return _find_plain(structure, "")
+
+
+def _find_plain(structure, prefix):
+    number = 0
+
+    for part in structure:
+        if not isinstance(part, list):
+            break  # multipart subtype + extension data
+        number += 1
+        section = f"{prefix}{number}"
+
+        if part and isinstance(part[0], list):
+            found = _find_plain(part, f"{section}.")
+            if found:
+                return found
+            continue
+
+        if _text(part[0]).lower() == "text" and _text(part[1]).lower() == "plain":
+            return _part_info(section, part)
+
+    return None
+
+
+def _part_info(section, part):
+    size = part[6] if len(part) > 6 else None
+    return {
+        "section": section,
+        "encoding": _text(part[5]).lower() if len(part) > 5 else "",
+        "charset": _params(part[2] if len(part) > 2 else None).get("charset") or "utf-8",
+        "size": int(size) if isinstance(size, bytes) and size.isdigit() else None,
+    }
+
+
+def decode_part(raw, encoding, charset):
+    """
+    Decodes a (possibly truncated) body part fetched with BODY.PEEK[n]<0.cap>.
+    """
+    raw = raw or b""
+
+    if encoding == "base64":
+        compact = re.sub(rb"[^A-Za-z0-9+/=]", b"", raw)
+        compact = compact[:len(compact) - len(compact) % 4]  # cut mid-quad
+        try:
+            raw = base64.b64decode(compact)
+        except (binascii.Error, ValueError):
+            raw = b""
+    elif encoding == "quoted-printable":
+        raw = quopri.decodestring(raw)
+
+    try:
+        codecs.lookup(charset)
+    except LookupError:
+        charset = "utf-8"
+
+    return raw.decode(charset, errors="ignore")
+
+
+def truncate_utf8(text, max_bytes):
+    """
+    Cuts text so its UTF-8 encoding is at most max_bytes, never in the
+    middle of a character.
+    """
+    encoded = text.encode("utf-8")
+    if len(encoded) <= max_bytes:
+        return text
+    return encoded[:max_bytes].decode("utf-8", errors="ignore")
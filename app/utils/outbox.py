@@ -0,0 +1,201 @@
+import json
+import smtplib
+import time
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import text, bindparam
+from app import mail
+
+
+# ============================================================
+# ENQUEUE (CALLED BY REQUEST HANDLERS)
+# ============================================================
+def enqueue_email(session, recipient, subject, html=None, body=None,
+                  sender=None, headers=None):
+    """
+    Queues an outbound email in email_outbox.
+    - Never talks to SMTP (the background sender does)
+    - Does NOT commit (caller controls transaction)
+    """
+    session.execute(
+        text("""
+            INSERT INTO email_outbox
+            (recipient, subject, html, body, sender, headers)
+            VALUES
+            (:recipient, :subject, :html, :body, :sender, :headers)
+        """),
+        {
+            "recipient": recipient,
+            "subject": subject,
+            "html": html,
+            "body": body,
+            "sender": sender,
+            "headers": json.dumps(headers) if headers else None
+        }
+    )
+
+
+# ============================================================
+# CLAIM A BATCH
+# ============================================================
+CLAIM_BATCH_SQL = """
+    SELECT id, recipient, subject, html, body, sender, headers, attempts
+    FROM email_outbox
+    WHERE status IN ('pending', 'sending')
+      AND next_attempt_at <= NOW()
+    ORDER BY id
+    LIMIT :limit
+    FOR UPDATE SKIP LOCKED
+"""
+
+
+def _claim_batch(session, limit):
+    """
+    Locks due messages and marks them 'sending'.
+    A 'sending' row whose lease (next_attempt_at) expired belongs to a
+    sender that died mid-batch and is picked up again.
+    """
+    rows = session.execute(text(CLAIM_BATCH_SQL), {"limit": limit}).fetchall()
+
+    if rows:
+        session.execute(
+            text("""
+                UPDATE email_outbox
+                SET status = 'sending',
+                    next_attempt_at = NOW() + INTERVAL :lease SECOND
+                WHERE id IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+            {
+                "ids": [r.id for r in rows],
+                "lease": current_app.config["OUTBOX_LEASE_SECONDS"]
+            }
+        )
+
+    session.commit()
+    return rows
+
+
+def _to_message(row):
+    return Message(
+        subject=row.subject,
+        recipients=[row.recipient],
+        html=row.html,
+        body=row.body,
+        sender=row.sender or current_app.config["MAIL_DEFAULT_SENDER"],
+        extra_headers=json.loads(row.headers) if row.headers else None
+    )
+
+
+def _mark_sent(session, outbox_id):
+    session.execute(
+        text("""
+            UPDATE email_outbox
+            SET status = 'sent', sent_at = NOW(), last_error = NULL
+            WHERE id = :id
+        """),
+        {"id": outbox_id}
+    )
+    session.commit()
+
+
+def _mark_failed(session, row, error):
+    """
+    Retries with exponential backoff; gives up after OUTBOX_MAX_ATTEMPTS.
+    """
+    config = current_app.config
+    attempts = row.attempts + 1
+    delay = min(config["OUTBOX_RETRY_BASE_SECONDS"] * 2 ** (attempts - 1), 3600)
+
+    session.execute(
+        text("""
+            UPDATE email_outbox
+            SET attempts = :attempts,
+                status = :status,
+                last_error = :error,
+                next_attempt_at = NOW() + INTERVAL :delay SECOND
+            WHERE id = :id
+        """),
+        {
+            "id": row.id,
+            "attempts": attempts,
+            "status": "failed" if attempts >= config["OUTBOX_MAX_ATTEMPTS"] else "pending",
+            "error": f"{type(error).__name__}: {error}"[:500],
+            "delay": delay
+        }
+    )
+    session.commit()
+
+
+def _release(session, rows):
+    # Put unsent rows back without counting an attempt
+    if rows:
+        session.execute(
+            text("""
+                UPDATE email_outbox
+                SET status = 'pending', next_attempt_at = NOW()
+                WHERE id IN :ids AND status = 'sending'
+            """).bindparams(bindparam("ids", expanding=True)),
+            {"ids": [r.id for r in rows]}
+        )
+        session.commit()
+
+
+# ============================================================
+# BACKGROUND SENDER
+# ============================================================
+def send_pending_emails():
+    """
+    Sends due outbox messages over ONE authenticated SMTP connection,
+    rate limited to MAIL_RATE_PER_MINUTE.
+    MUST be called inside app.app_context()
+    (Handled by scheduler.py or outbox_worker.py)
+    """
+    config = current_app.config
+    session = current_app.session()
+    sent = 0
+
+    try:
+        rows = _claim_batch(session, config["OUTBOX_BATCH_SIZE"])
+        if not rows:
+            return 0
+
+        interval = 60.0 / config["MAIL_RATE_PER_MINUTE"]
+        next_slot = time.monotonic()
+        done = set()
+
+        try:
+            with mail.connect() as conn:
+                for i, row in enumerate(rows):
+                    wait = next_slot - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    next_slot = time.monotonic() + interval
+
+                    done.add(row.id)
+                    try:
+                        conn.send(_to_message(row))
+                    except smtplib.SMTPServerDisconnected as e:
+                        _mark_failed(session, row, e)
+                        _release(session, rows[i + 1:])
+                        done.update(r.id for r in rows[i + 1:])
+                        break
+                    except Exception as e:
+                        print(f"❌ Outbox email {row.id} failed:", e)
+                        _mark_failed(session, row, e)
+                        continue
+
+                    _mark_sent(session, row.id)
+                    sent += 1
+
+        except Exception as e:
+            # Connect/login failed: retry what wasn't attempted later
+            print("❌ SMTP connection failed:", e)
+            for row in rows:
+                if row.id not in done:
+                    _mark_failed(session, row, e)
+
+        print(f"📨 Outbox sent: {sent}/{len(rows)}")
+        return sent
+
+    finally:
+        session.close()
@@ -0,0 +1,213 @@
+from contextlib import contextmanager
+from datetime import datetime
+from pymysql.cursors import RE_INSERT_VALUES
+from sqlalchemy import event, text
+from sqlalchemy.dialects.mysql import pymysql
+from sqlalchemy.engine import Engine
+from app.routes.ticket_routes import BULK_ACTIVITY_SQL
+from app.utils.cache import disable_dashboard_cache
+from app.utils.fanout import NOTIFICATIONS_SQL
+from app.utils.outbox import CLAIM_BATCH_SQL
+from app.utils.slack_notifier import SLA_SCAN_SQL
+from app.utils.view_log import view_recorder, VIEW_NOTES_SQL
+
+
+# A full scan (type=ALL) over at least this many estimated rows fails
+# the check, whether or not MySQL had an index it could have used
+LARGE_TABLE_ROWS = 10000
+
+# Pages requested as each role; the SQL they run is captured and EXPLAINed.
+# {ticket_id} / {cursor} / {offset} are filled in by check_query_plans.
+CHECKED_PAGES = (
+    ("admin", "/"),
+    ("admin", "/?cursor={cursor}"),
+    ("admin", "/?filter=unresolved"),
+    ("admin", "/?filter=resolved"),
+    ("admin", "/?filter=overdue"),
+    ("admin", "/?search=TCK-00001"),
+    ("admin", "/?search=printer+jam"),
+    ("admin", "/?search=printer+jam&cursor={offset}"),
+    ("admin", "/?search=joel@vecchio"),
+    ("admin", "/?search=ab"),
+    ("admin", "/tickets/export?format=csv&filter=unresolved"),
+    ("admin", "/tickets/trends?days=90"),
+    ("admin", "/ticket/{ticket_id}"),
+    ("admin", "/ticket/{ticket_id}?hide_system=1&notes_cursor={cursor}"),
+    ("admin", "/notifications/unread"),
+    ("admin", "/notifications/count"),
+    ("admin", "/notifications/all"),
+    ("agent", "/"),
+    ("agent", "/?my=1&filter=unresolved"),
+    ("agent", "/?search=printer+jam"),
+    ("agent", "/tickets/trends?days=90"),
+)
+
+# Background jobs (not reachable through a page): same SQL objects the
+# jobs execute. The email listener is a standalone script; its only
+# lookup is tickets.message_id IN (...) on the unique key.
+JOB_QUERIES = {
+    "sla: warning / overdue scan": (SLA_SCAN_SQL, {}),
+    "outbox: claim due batch": (CLAIM_BATCH_SQL, {"limit": 50}),
+}
+
+# INSERTs run with a list of rows (executemany). PyMySQL only turns them
+# into ONE multi-row INSERT when every VALUES slot is a placeholder; a
+# literal or NOW() silently falls back to one statement per row.
+# (email_listener's tickets INSERT lives in the standalone script.)
+BATCHED_INSERTS = {
+    "tickets/bulk: activity": BULK_ACTIVITY_SQL,
+    "notifications fan-out": NOTIFICATIONS_SQL,
+    "view log flush": VIEW_NOTES_SQL,
+}
+
+
+# ============================================================
+# CAPTURE THE SQL A REQUEST RUNS
+# ============================================================
+@contextmanager
+def capture_queries():
+    """
+    Records every SELECT sent to MySQL inside the block, as the driver
+    saw it: [(statement, parameters), ...].
+    """
+    captured = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        if not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            captured.append((statement, parameters))
+
+    event.listen(Engine, "before_cursor_execute", _record)
+    try:
+        yield captured
+    finally:
+        event.remove(Engine, "before_cursor_execute", _record)
+
+
+def _page_queries(app, session):
+    """
+    Requests every CHECKED_PAGES url through the test client, logged in
+    as the first admin / agent, and returns {label: [(statement, params)]}.
+    """
+    from app.routes.ticket_routes import _encode_cursor, _encode_offset
+
+    users = {
+        role: session.execute(
+            text("SELECT id FROM users WHERE role = :role ORDER BY id LIMIT 1"),
+            {"role": role}
+        ).scalar()
+        for role in ("admin", "agent")
+    }
+    ticket_id = session.execute(text("SELECT MAX(id) FROM tickets")).scalar()
+    session.rollback()
+
+    values = {
+        "ticket_id": ticket_id,
+        "cursor": _encode_cursor(datetime(2030, 1, 1), 2 ** 31 - 1),
+        "offset": _encode_offset(50),
+    }
+
+    # Every page must reach the database (a cached dashboard runs no
+    # ticket queries), and a plan check must not leave "viewed this
+    # ticket" rows behind
+    disable_dashboard_cache()
+    view_recorder.enabled = False
+
+    client = app.test_client()
+    queries = {}
+
+    for role, url in CHECKED_PAGES:
+        if users[role] is None or (ticket_id is None and "{ticket_id}" in url):
+            print(f"⚠️ Skipped {role} {url} (no {role} user or no ticket yet)")
+            continue
+
+        url = url.format(**values)
+        with client.session_transaction() as flask_session:
+            flask_session["_user_id"] = str(users[role])
+            flask_session["_fresh"] = True
+
+        with capture_queries() as captured:
+            response = client.get(url)
+            response.get_data()  # drain streamed responses (export)
+
+        if response.status_code != 200:
+            print(f"⚠️ {role} {url} returned {response.status_code}")
+        queries[f"{role} {url}"] = captured
+
+    return queries
+
+
+# ============================================================
+# BATCHING CHECK (NO DATABASE NEEDED)
+# ============================================================
+def check_batched_inserts():
+    """
+    Compiles every BATCHED_INSERTS statement the way the driver receives
+    it and returns a problem for each one PyMySQL's executemany would
+    send row by row.
+    """
+    dialect = pymysql.dialect()
+    problems = []
+
+    for name, sql in BATCHED_INSERTS.items():
+        compiled = str(text(sql).compile(dialect=dialect))
+        if not RE_INSERT_VALUES.match(compiled):
+            problems.append(
+                f"{name}: executemany can't batch this INSERT (VALUES must be "
+                f"placeholders only)\n    {' '.join(compiled.split())}"
+            )
+
+    return problems
+
+
+# ============================================================
+# PLAN CHECK
+# ============================================================
+def check_query_plans(app, min_rows=LARGE_TABLE_ROWS):
+    """
+    EXPLAINs the SQL the app really runs (captured from CHECKED_PAGES,
+    plus JOB_QUERIES) and returns a list of problems: full scans
+    (type=ALL) estimated at min_rows rows or more, plus every
+    check_batched_inserts() problem.
+    On a small dev database pass a low min_rows to see every scan.
+    """
+    problems = check_batched_inserts()
+
+    with app.app_context():
+        session = app.session()
+        try:
+            checks = _page_queries(app, session)
+
+            with capture_queries() as captured:
+                for sql, params in JOB_QUERIES.values():
+                    session.execute(text(sql), params)
+                    session.rollback()
+            checks.update(
+                (name, [query]) for name, query in zip(JOB_QUERIES, captured)
+            )
+
+            # Straight to the DBAPI cursor, with the exact statement and
+            # parameters the driver received
+            cursor = session.connection().connection.cursor()
+            seen = set()
+
+            for name, queries in checks.items():
+                for statement, parameters in queries:
+                    if statement in seen:
+                        continue
+                    seen.add(statement)
+
+                    cursor.execute(f"EXPLAIN {statement}", parameters)
+                    columns = [c[0] for c in cursor.description]
+                    rows = [dict(zip(columns, r)) for r in cursor.fetchall()]
+
+                    for row in rows:
+                        if row["type"] == "ALL" and (row["rows"] or 0) >= min_rows:
+                            problems.append(
+                                f"{name}: full scan of {row['table']} "
+                                f"(~{row['rows']} rows)\n    {' '.join(statement.split())}"
+                            )
+        finally:
+            session.rollback()
+            session.close()
+
+    return problems
@@ -0,0 +1,135 @@
+from sqlalchemy import text
+
+
+# ============================================================
+# DAILY TICKET ROLLUP
+# ============================================================
+# ticket_daily_rollup holds one counter per
+# (created day, priority, status, agent_id) — agent_id 0 = unassigned.
+# The trg_tickets_rollup_* triggers (models.sql) keep it current on
+# insert / priority / status / assignment changes; the nightly job
+# below rebuilds recent days from tickets to repair any drift.
+
+RECONCILE_DAYS = 90
+MAX_TREND_DAYS = 366
+
+_PRIORITIES = ("High", "Medium", "Low")
+_STATUSES = ("Open", "In Progress", "Resolved")
+
+
+def reconcile_rollup(session, days=RECONCILE_DAYS):
+    """
+    Recomputes the rollup for the last `days` days (None = everything).
+    Commits.
+    """
+    since = "" if days is None else "WHERE created_at >= CURDATE() - INTERVAL :days DAY"
+    day_filter = "" if days is None else "WHERE day >= CURDATE() - INTERVAL :days DAY"
+    params = {} if days is None else {"days": days}
+
+    session.execute(text(f"DELETE FROM ticket_daily_rollup {day_filter}"), params)
+
+    result = session.execute(
+        text(f"""
+            INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+            SELECT
+                DATE(created_at),
+                COALESCE(priority, 'Medium'),
+                COALESCE(status, 'Open'),
+                COALESCE(assigned_to, 0),
+                COUNT(*)
+            FROM tickets
+            {since}
+            GROUP BY 1, 2, 3, 4
+        """),
+        params
+    )
+
+    session.commit()
+    print(f"📊 Ticket rollup reconciled: {result.rowcount} bucket(s), last {days or 'all'} day(s)")
+
+
+def rollup_kpis(session, agent_id=None):
+    """
+    All-time status / priority totals from the rollup (no ticket scan).
+    agent_id limits it to one agent's tickets.
+    """
+    where = "WHERE agent_id = :agent_id" if agent_id else ""
+
+    row = session.execute(
+        text(f"""
+            SELECT
+                COALESCE(SUM(total), 0) AS total,
+                COALESCE(SUM(IF(status IN ('Open','In Progress'), total, 0)), 0) AS unresolved,
+                COALESCE(SUM(IF(status = 'Resolved', total, 0)), 0) AS resolved,
+                COALESCE(SUM(IF(priority = 'High', total, 0)), 0) AS high,
+                COALESCE(SUM(IF(priority = 'Medium', total, 0)), 0) AS medium,
+                COALESCE(SUM(IF(priority = 'Low', total, 0)), 0) AS low
+            FROM ticket_daily_rollup
+            {where}
+        """),
+        {"agent_id": agent_id}
+    ).fetchone()
+
+    return {k: int(v) for k, v in row._mapping.items()}
+
+
+def ticket_trends(session, days, agent_id=None):
+    """
+    Per-day counts (by priority + status) and per-agent totals
+    for tickets created in the last `days` days.
+    """
+    params = {"days": days - 1, "agent_id": agent_id}
+    agent_filter = "AND r.agent_id = :agent_id" if agent_id else ""
+
+    rows = session.execute(
+        text(f"""
+            SELECT r.day, r.priority, r.status, SUM(r.total) AS total
+            FROM ticket_daily_rollup r
+            WHERE r.day >= CURDATE() - INTERVAL :days DAY
+            {agent_filter}
+            GROUP BY r.day, r.priority, r.status
+            ORDER BY r.day
+        """),
+        params
+    ).fetchall()
+
+    by_day = {}
+    for r in rows:
+        entry = by_day.setdefault(
+            r.day.isoformat(),
+            {"total": 0, **dict.fromkeys(_PRIORITIES, 0), **dict.fromkeys(_STATUSES, 0)}
+        )
+        entry["total"] += int(r.total)
+        entry[r.priority] += int(r.total)
+        entry[r.status] += int(r.total)
+
+    agents = session.execute(
+        text(f"""
+            SELECT
+                r.agent_id,
+                u.email,
+                SUM(r.total) AS total,
+                SUM(IF(r.status = 'Resolved', r.total, 0)) AS resolved
+            FROM ticket_daily_rollup r
+            LEFT JOIN users u ON u.id = r.agent_id
+            WHERE r.day >= CURDATE() - INTERVAL :days DAY
+            {agent_filter}
+            GROUP BY r.agent_id, u.email
+            ORDER BY total DESC
+        """),
+        params
+    ).fetchall()
+
+    return {
+        "days": days,
+        "by_day": [{"day": day, **counts} for day, counts in by_day.items()],
+        "by_agent": [
+            {
+                "agent_id": a.agent_id or None,
+                "email": a.email or "Unassigned",
+                "total": int(a.total),
+                "resolved": int(a.resolved),
+            }
+            for a in agents
+        ],
+    }
@@ -12,7 +12,7 @@ from apscheduler.jobstores.memory import MemoryJobStore
 # ============================================================
 scheduler = BackgroundScheduler(
     jobstores={"default": MemoryJobStore()},
-    executors={"default": ThreadPoolExecutor(max_workers=1)},
+    executors={"default": ThreadPoolExecutor(max_workers=2)},
     timezone="UTC",
 )
 
@@ -38,6 +38,40 @@ def _run_overdue_notifier(app):
         print("⚠️ Scheduler job error:", e)
 
 
+def _run_outbox_sender(app):
+    """
+    Delivers queued outbound emails.
+    Must never crash the scheduler.
+    """
+    try:
+        from app.utils.outbox import send_pending_emails
+
+        with app.app_context():
+            send_pending_emails()
+
+    except Exception as e:
+        print("⚠️ Outbox job error:", e)
+
+
+def _run_rollup_reconcile(app):
+    """
+    Rebuilds recent days of ticket_daily_rollup from tickets.
+    Must never crash the scheduler.
+    """
+    try:
+        from app.utils.rollup import reconcile_rollup
+
+        with app.app_context():
+            session = app.session()
+            try:
+                reconcile_rollup(session)
+            finally:
+                session.close()
+
+    except Exception as e:
+        print("⚠️ Rollup job error:", e)
+
+
 # ============================================================
 # START SCHEDULER (ONCE ONLY)
 # ============================================================
@@ -63,10 +97,35 @@ def start_scheduler(app):
         coalesce=True,
     )
 
+    scheduler.add_job(
+        id="outbox_sender",
+        func=_run_outbox_sender,
+        args=[app],
+        trigger="interval",
+        seconds=15,
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
+    # Dev server only: under gunicorn this scheduler never starts, so
+    # production runs rollup_worker.py (or its --once mode from cron)
+    scheduler.add_job(
+        id="ticket_rollup_reconcile",
+        func=_run_rollup_reconcile,
+        args=[app],
+        trigger="cron",
+        hour=2,
+        minute=30,
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+    )
+
     scheduler.start()
     _scheduler_started = True
 
     # Silence APScheduler noise
     logging.getLogger("apscheduler").setLevel(logging.WARNING)
 
-    print("✅ Background scheduler started (Overdue Ticket Notifier)")
+    print("✅ Background scheduler started (Overdue Ticket Notifier, Outbox Sender, Rollup Reconcile)")
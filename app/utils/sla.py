@@ -0,0 +1,19 @@
+# ============================================================
+# SLA DEFINITION
+# ============================================================
+# Deadlines are materialized on the ticket row by the trg_tickets_sla_*
+# triggers (models.sql), on insert and whenever priority changes:
+#   High = 24h, Medium = 48h, Low = 72h, warning once 80% has elapsed
+#
+#   sla_hours  - the rule that applied
+#   warn_at    - created_at + 80% of sla_hours
+#   due_at     - created_at + sla_hours
+#
+# Every SLA consumer filters with the predicates below so they stay
+# index range scans on (status, due_at) / (status, warn_at).
+
+ACTIVE_SQL = "t.status IN ('Open','In Progress')"
+
+OVERDUE_SQL = f"{ACTIVE_SQL} AND t.due_at <= NOW()"
+
+WARNING_SQL = f"{ACTIVE_SQL} AND t.warn_at <= NOW() AND t.due_at > NOW()"
@@ -1,9 +1,11 @@
 from sqlalchemy import text
-from app.utils.slack_notifier import send_slack_alert
+from app.utils.slack_notifier import send_slack_message
+from app.utils.sla import OVERDUE_SQL
+from app.utils.cache import tickets_changed
 
 def check_overdue_tickets(session):
     overdue_tickets = session.execute(
-        text("""
+        text(f"""
             SELECT 
                 t.id,
                 t.ticket_code,
@@ -12,8 +14,7 @@ def check_overdue_tickets(session):
             FROM tickets t
             LEFT JOIN users u ON t.assigned_to = u.id
             WHERE 
-                t.status != 'Resolved'
-                AND t.created_at < NOW() - INTERVAL 72 HOUR
+                {OVERDUE_SQL}
                 AND t.slack_notified = 0
         """)
     ).fetchall()
@@ -27,7 +28,7 @@ def check_overdue_tickets(session):
             f"*Status:* OVERDUE\n"
         )
 
-        send_slack_alert(message)
+        send_slack_message(message)
 
         # Mark as notified
         session.execute(
@@ -35,4 +36,6 @@ def check_overdue_tickets(session):
             {"id": t.id}
         )
 
-    session.commit()
\ No newline at end of file
+    session.commit()
+    if overdue_tickets:
+        tickets_changed(session)
\ No newline at end of file
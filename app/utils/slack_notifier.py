@@ -1,6 +1,30 @@
 import requests
 from sqlalchemy import text
 from flask import current_app
+from app.utils.sla import OVERDUE_SQL, WARNING_SQL
+from app.utils.cache import tickets_changed
+from app.utils.fanout import notify, notify_each
+
+
+# Only tickets past their warning point, minus overdue ones
+# already alerted (indexed: status + warn_at / due_at)
+SLA_SCAN_SQL = f"""
+    SELECT
+        t.id,
+        t.ticket_code,
+        t.email AS client_email,
+        t.priority,
+        t.slack_notified,
+        t.due_at <= NOW() AS is_overdue,
+        TIMESTAMPDIFF(HOUR, NOW(), t.due_at) AS remaining_hours,
+        TIMESTAMPDIFF(HOUR, t.due_at, NOW()) AS over_by_hours,
+        u.id AS agent_id,
+        u.email AS agent_email
+    FROM tickets t
+    LEFT JOIN users u ON t.assigned_to = u.id
+    WHERE ({WARNING_SQL})
+       OR ({OVERDUE_SQL} AND t.slack_notified = 0)
+"""
 
 # ============================================================
 # SLACK SENDER
@@ -30,24 +54,6 @@ def send_slack_message(message: str) -> bool:
         return False
 
 
-# ============================================================
-# IN-APP NOTIFICATION
-# ============================================================
-def notify_user(session, user_id, ticket_id, ticket_code, message):
-    session.execute(
-        text("""
-            INSERT INTO notifications (user_id, ticket_id, ticket_code, message)
-            VALUES (:user_id, :ticket_id, :ticket_code, :message)
-        """),
-        {
-            "user_id": user_id,
-            "ticket_id": ticket_id,
-            "ticket_code": ticket_code,
-            "message": message
-        }
-    )
-
-
 # ============================================================
 # OVERDUE + SLA WARNING NOTIFIER
 # ============================================================
@@ -59,46 +65,24 @@ def notify_overdue_tickets():
 
     session = current_app.session()
 
-    tickets = session.execute(
-        text("""
-            SELECT
-                t.id,
-                t.ticket_code,
-                t.email AS client_email,
-                t.priority,
-                t.slack_notified,
-                TIMESTAMPDIFF(HOUR, t.created_at, NOW()) AS elapsed_hours,
-                u.id AS agent_id,
-                u.email AS agent_email
-            FROM tickets t
-            LEFT JOIN users u ON t.assigned_to = u.id
-            WHERE t.status != 'Resolved'
-        """)
-    ).fetchall()
+    tickets = session.execute(text(SLA_SCAN_SQL)).fetchall()
 
     if not tickets:
-        print("✅ No active tickets")
+        print("✅ No tickets near or past SLA")
         session.close()
         return
 
     sent = 0
+    warned = []    # (agent_id, ticket_id, ticket_code)
+    overdue = []   # (ticket_id, ticket_code, agent_id)
 
     for t in tickets:
-        # SLA rules
-        if t.priority == "High":
-            sla = 24
-        elif t.priority == "Medium":
-            sla = 48
-        else:
-            sla = 72
-
-        elapsed = t.elapsed_hours
-        remaining = sla - elapsed
+        remaining = t.remaining_hours
 
         # ================================
         # SLA WARNING (80% threshold)
         # ================================
-        if remaining > 0 and remaining <= sla * 0.2:
+        if not t.is_overdue:
             warning_msg = (
                 "⏳ *SLA WARNING*\n"
                 f"*Ticket:* {t.ticket_code}\n"
@@ -111,19 +95,13 @@ def notify_overdue_tickets():
             send_slack_message(warning_msg)
 
             if t.agent_id:
-                notify_user(
-                    session,
-                    t.agent_id,
-                    t.id,
-                    t.ticket_code,
-                    f"SLA warning: ticket {t.ticket_code} nearing deadline"
-                )
+                warned.append((t.agent_id, t.id, t.ticket_code))
 
         # ================================
         # OVERDUE (SEND ONCE ONLY)
         # ================================
-        if elapsed > sla and t.slack_notified == 0:
-            over_by = elapsed - sla
+        if t.is_overdue and t.slack_notified == 0:
+            over_by = t.over_by_hours
 
             overdue_msg = (
                 "🚨 *OVERDUE TICKET ALERT*\n"
@@ -146,33 +124,30 @@ def notify_overdue_tickets():
                     {"id": t.id}
                 )
 
-                # Notify assigned agent
-                if t.agent_id:
-                    notify_user(
-                        session,
-                        t.agent_id,
-                        t.id,
-                        t.ticket_code,
-                        f"Ticket {t.ticket_code} is overdue"
-                    )
-
-                # Notify admins
-                admins = session.execute(
-                    text("SELECT id FROM users WHERE role = 'admin'")
-                ).fetchall()
-
-                for admin in admins:
-                    notify_user(
-                        session,
-                        admin.id,
-                        t.id,
-                        t.ticket_code,
-                        f"Overdue ticket {t.ticket_code} requires attention"
-                    )
-
+                overdue.append((t.id, t.ticket_code, t.agent_id))
                 sent += 1
 
+    # ================================
+    # IN-APP NOTIFICATIONS (BATCHED)
+    # ================================
+    # Warnings repeat every run while in the window → skip unread duplicates
+    notify_each(session, warned, "SLA warning: ticket {code} nearing deadline", dedupe=True)
+
+    notify_each(
+        session,
+        [(agent_id, ticket_id, code) for ticket_id, code, agent_id in overdue if agent_id],
+        "Ticket {code} is overdue"
+    )
+
+    if overdue:
+        notify(
+            session, "admin", [(t[0], t[1]) for t in overdue],
+            "Overdue ticket {code} requires attention"
+        )
+
     session.commit()
+    if overdue:
+        tickets_changed(session)
     session.close()
 
     print(f"🔔 Slack alerts sent: {sent}")
@@ -0,0 +1,91 @@
+import re
+
+
+# Must match the FULLTEXT index column list (ft_tickets_search)
+FULLTEXT_COLUMNS = "t.ticket_code, t.email, t.description"
+
+# innodb_ft_min_token_size (default 3): shorter words are not indexed
+MIN_TOKEN_CHARS = 3
+
+# INFORMATION_SCHEMA.INNODB_FT_DEFAULT_STOPWORD: never indexed, and a
+# required (+) stopword makes a BOOLEAN MODE search return no rows
+INNODB_STOPWORDS = frozenset("""
+    a about an are as at be by com de en for from how i in is it la of on
+    or that the this to was what when where who will with und www
+""".split())
+
+TICKET_CODE_RE = re.compile(r"^TCK-\d+$", re.IGNORECASE)
+
+
+def boolean_query(search):
+    """
+    "printer jam" → "+printer* +jam*" (every word required, prefix match).
+    Short words and InnoDB stopwords are left out: they aren't indexed.
+    Returns None when no word is left.
+    """
+    words = [
+        w for w in re.findall(r"\w+", search.lower())
+        if len(w) >= MIN_TOKEN_CHARS and w not in INNODB_STOPWORDS
+    ]
+    if not words:
+        return None
+    return " ".join(f"+{w}*" for w in words)
+
+
+def like_prefix(value):
+    """
+    "a_b%" → "a\\_b\\%%": value as a literal prefix for LIKE ... ESCAPE '\\'
+    (a typed % or _ must not act as a wildcard).
+    """
+    escaped = value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"{escaped}%"
+
+
+def build_search(search):
+    """
+    Turns the dashboard search box into (where_sql, params, rank_sql).
+    - Ticket code          → indexed equality
+    - Anything with "@"    → sender email prefix (idx_tickets_email) OR
+                             FULLTEXT, so partial addresses and ones
+                             only quoted in the description still match
+    - Free text            → FULLTEXT MATCH ... AGAINST (ranked)
+    - Only tiny words      → prefix LIKE on code/email (index-friendly)
+    rank_sql is None when results aren't relevance-ranked.
+    """
+    search = search.strip()
+
+    if TICKET_CODE_RE.match(search):
+        return " AND t.ticket_code = :s", {"s": search.upper()}, None
+
+    query = boolean_query(search)
+
+    if "@" in search:
+        prefix = {"s": like_prefix(search.lower())}
+        if query is None:
+            return " AND t.email LIKE :s ESCAPE '\\\\'", prefix, None
+
+        # OR across two indexes can't use either: collect the ids from
+        # each index separately (the derived table is materialized once)
+        return (
+            f"""
+            AND t.id IN (
+                SELECT hits.id FROM (
+                    SELECT t.id FROM tickets t WHERE t.email LIKE :s ESCAPE '\\\\'
+                    UNION
+                    SELECT t.id FROM tickets t
+                    WHERE MATCH({FULLTEXT_COLUMNS}) AGAINST (:q IN BOOLEAN MODE)
+                ) AS hits
+            )
+            """,
+            dict(prefix, q=query),
+            None
+        )
+    if query is None:
+        return (
+            " AND (t.ticket_code LIKE :s ESCAPE '\\\\' OR t.email LIKE :s ESCAPE '\\\\')",
+            {"s": like_prefix(search)},
+            None
+        )
+
+    match = f"MATCH({FULLTEXT_COLUMNS}) AGAINST (:q IN BOOLEAN MODE)"
+    return f" AND {match}", {"q": query}, match
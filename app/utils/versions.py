@@ -0,0 +1,31 @@
+from sqlalchemy import text
+
+
+# ============================================================
+# CONFIG / DATA VERSION COUNTERS
+# ============================================================
+def get_version(session, name):
+    """
+    Current value of a version counter (0 if it doesn't exist yet).
+    In-process caches compare it to know when to reload.
+    """
+    version = session.execute(
+        text("SELECT version FROM config_versions WHERE name = :name"),
+        {"name": name}
+    ).scalar()
+    return version or 0
+
+
+def bump_version(session, name):
+    """
+    Increments a version counter.
+    Does NOT commit (caller controls transaction).
+    """
+    session.execute(
+        text("""
+            INSERT INTO config_versions (name, version)
+            VALUES (:name, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """),
+        {"name": name}
+    )
@@ -0,0 +1,129 @@
+import atexit
+import threading
+import time
+from datetime import timedelta
+from flask import current_app
+from sqlalchemy import text
+
+
+# One "viewed this ticket" row per (user, ticket, window)
+VIEW_WINDOW_SECONDS = 30 * 60
+FLUSH_INTERVAL_SECONDS = 10
+
+# Safety valve if the database is down for a long time
+MAX_PENDING_VIEWS = 10000
+
+# Only plain placeholders in VALUES (no literal, no NOW()): PyMySQL's
+# executemany only rewrites that shape into ONE multi-row INSERT,
+# anything else is one round trip per row
+VIEW_NOTES_SQL = """
+    INSERT INTO ticket_notes
+    (ticket_id, user_id, note, is_system, created_at)
+    VALUES (:ticket_id, :user_id, :note, :is_system, :created_at)
+"""
+
+
+# ============================================================
+# BUFFERED VIEW ACTIVITY
+# ============================================================
+class ViewRecorder:
+    """
+    Collects ticket views in memory and writes them to ticket_notes in
+    bulk from a background thread, so GET /ticket/<id> stays read-only.
+    - Repeat views by the same user within VIEW_WINDOW_SECONDS are
+      coalesced into the first one
+    - Per process: with N gunicorn workers a view can be logged up to
+      N times per window, never once per refresh
+    """
+
+    def __init__(self, window_seconds=VIEW_WINDOW_SECONDS,
+                 flush_interval=FLUSH_INTERVAL_SECONDS):
+        self.window = window_seconds
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._logged = set()  # keys already flushed (current + previous window)
+        self._app = None
+        self._thread = None
+        self.enabled = True  # False: drop events (e.g. migrate.py --check-plans)
+
+    def record(self, user_id, email, ticket_id):
+        if not self.enabled:
+            return
+
+        bucket = int(time.time() // self.window)
+        key = (user_id, ticket_id, bucket)
+
+        with self._lock:
+            if key in self._pending or key in self._logged:
+                return
+            if len(self._pending) >= MAX_PENDING_VIEWS:
+                return
+
+            self._pending[key] = {
+                "ticket_id": ticket_id,
+                "user_id": user_id,
+                "note": f"👀 {email} viewed this ticket",
+                "seen_at": time.monotonic(),
+            }
+
+            if self._thread is None:
+                self._start(current_app._get_current_object())
+
+    def _start(self, app):
+        self._app = app
+        self._thread = threading.Thread(target=self._run, name="view-log-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print("⚠️ View log flush error:", e)
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, {}
+            current = int(time.time() // self.window)
+            self._logged = {k for k in self._logged if k[2] >= current - 1}
+            self._logged.update(batch)
+
+        if not batch or self._app is None:
+            return 0
+
+        now = time.monotonic()
+
+        with self._app.app_context():
+            session = self._app.session()
+            try:
+                # created_at comes from the DB clock like every other note,
+                # so the (created_at, id) timeline holds whatever the app
+                # host's time zone: read it once, back-date each view in Python
+                db_now = session.execute(text("SELECT NOW()")).scalar()
+                rows = [
+                    {
+                        "ticket_id": v["ticket_id"],
+                        "user_id": v["user_id"],
+                        "note": v["note"],
+                        "is_system": 1,
+                        "created_at": db_now - timedelta(seconds=int(now - v["seen_at"])),
+                    }
+                    for v in batch.values()
+                ]
+
+                session.execute(text(VIEW_NOTES_SQL), rows)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                print(f"❌ Dropped {len(batch)} view event(s):", e)
+                return 0
+            finally:
+                session.close()
+
+        return len(batch)
+
+
+view_recorder = ViewRecorder()
@@ -15,12 +15,45 @@ class Config:
     MAIL_PASSWORD = os.environ.get("EMAIL_PASSWORD")
     MAIL_DEFAULT_SENDER = MAIL_USERNAME
 
+    # Outbox (request handlers only enqueue; a background sender delivers)
+    MAIL_RATE_PER_MINUTE = int(os.environ.get("MAIL_RATE_PER_MINUTE", 60))
+    OUTBOX_BATCH_SIZE = 50
+    OUTBOX_MAX_ATTEMPTS = 6
+    OUTBOX_RETRY_BASE_SECONDS = 60
+    OUTBOX_LEASE_SECONDS = 600
+
     # ============================
     # DATABASE
     # ============================
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Optional read replica for @read_only views (dashboard, polling)
+    SQLALCHEMY_REPLICA_URI = os.environ.get("DATABASE_REPLICA_URL")
+
+    # After a write, that user reads from the primary for this long
+    READ_YOUR_WRITES_SECONDS = 10
+
+    # ============================
+    # DASHBOARD CACHE
+    # ============================
+    # Unset = per-process LRU; redis://host:6379/0 = shared by all
+    # gunicorn workers (needs the redis package)
+    DASHBOARD_CACHE_URL = os.environ.get("DASHBOARD_CACHE_URL")
+    DASHBOARD_CACHE_TTL_SECONDS = 30
+    DASHBOARD_CACHE_MAX_ENTRIES = 1024
+
+    # ============================
+    # EMAIL INGEST (email_listener.py)
+    # ============================
+    # JSON list of mailboxes to watch, e.g.
+    # [{"name": "support", "host": "imap.gmail.com", "port": 993, "ssl": true,
+    #   "user": "...", "password": "...", "folder": "INBOX"}]
+    INGEST_MAILBOXES = os.environ.get("INGEST_MAILBOXES")
+
+    # Max mailboxes writing to the DB at the same time
+    INGEST_DB_WRITERS = int(os.environ.get("INGEST_DB_WRITERS", 2))
+
     # ============================
     # SLACK
     # ============================
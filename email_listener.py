@@ -1,12 +1,25 @@
 import imaplib
 import email
+import json
+import multiprocessing
+import queue
+import threading
+import zlib
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from email.header import decode_header
-from sqlalchemy import text
+from sqlalchemy import text, bindparam, event
+from sqlalchemy.exc import IntegrityError
 from app import create_app
 import socket
 import re
 import time
-from app.utils.notifier import notify_user
+from app.utils.allowlist import sender_allowlist
+from app.utils.priority import priority_classifier
+from app.utils.checkpoint import load_checkpoint, save_checkpoint
+from app.utils.imap_fetch import uid_fetch, fetch_item, find_text_part, decode_part, truncate_utf8
+from app.utils.cache import tickets_changed
 
 
 # ============================================================
@@ -14,91 +27,80 @@ from app.utils.notifier import notify_user
 # ============================================================
 flask_app = create_app()
 
-# ============================================================
-# UID Tracker
-# ============================================================
-UID_FILE = "last_uid.txt"
-
-def get_last_uid():
-    try:
-        with open(UID_FILE, "r") as f:
-            return int(f.read().strip())
-    except:
-        return 0
-
-def save_last_uid(uid):
-    with open(UID_FILE, "w") as f:
-        f.write(str(uid))
-
-
 # ============================================================
 # IMAP CONFIG
 # ============================================================
 IMAP_HOST = "imap.gmail.com"
 EMAIL_USER = "danny.villanueva@leaders.st"
 EMAIL_PASS = "gewm ihry cfgn jnds"
+IMAP_FOLDER = "INBOX"
 
 socket.setdefaulttimeout(30)
 
+MailboxConfig = namedtuple(
+    "MailboxConfig", "name host port ssl user password folder"
+)
+
+
+def load_mailboxes():
+    """
+    Mailboxes to watch: INGEST_MAILBOXES (JSON list) or the
+    single account above. "ssl": false allows a local plain IMAP
+    stand-in server for testing.
+    """
+    raw = flask_app.config.get("INGEST_MAILBOXES")
+    entries = json.loads(raw) if raw else [{
+        "host": IMAP_HOST,
+        "user": EMAIL_USER,
+        "password": EMAIL_PASS,
+        "folder": IMAP_FOLDER,
+    }]
+
+    mailboxes = []
+    for entry in entries:
+        use_ssl = entry.get("ssl", True)
+        folder = entry.get("folder", "INBOX")
+        mailboxes.append(MailboxConfig(
+            name=entry.get("name") or f"{entry['user']}/{folder}",
+            host=entry["host"],
+            port=int(entry.get("port") or (993 if use_ssl else 143)),
+            ssl=use_ssl,
+            user=entry["user"],
+            password=entry["password"],
+            folder=folder,
+        ))
+    return mailboxes
+
+
+# Messages fetched + persisted per UID FETCH / DB transaction
+INGEST_BATCH_SIZE = 50
+
+# Max bytes of the (still encoded) text part downloaded per email
+MAX_BODY_BYTES = 64 * 1024
+
+# tickets.description is TEXT: at most 65535 bytes once stored as UTF-8.
+# Decoding (charset, quoted-printable) can grow the fetched bytes, so the
+# decoded body is cut to this separately from the fetch cap above.
+MAX_DESCRIPTION_BYTES = 65535
+
+# Re-issue IDLE before the server's 29-minute cutoff
+IDLE_RENEW_SECONDS = 25 * 60
+
+# Socket read timeout while idling (not an error, just a wakeup)
+IDLE_POLL_SECONDS = 30
+
+# Pipeline: bounded queues (in chunks) between fetch → parse → persist
+PARSE_QUEUE_SIZE = 8
+PERSIST_QUEUE_SIZE = 8
+PARSER_PROCESSES = 2
+WRITER_MAX_TICKETS = 200
+STATS_INTERVAL_SECONDS = 60
+
 # ============================================================
-# SMTP CONFIG (AUTO-REPLY)
-# ============================================================
-SMTP_HOST = "smtp.gmail.com"
-SMTP_PORT = 587
-SMTP_USER = EMAIL_USER
-SMTP_PASS = EMAIL_PASS
-
-
-ALLOWED_SENDER_EMAILS = {
-    "specialedflint@gmail.com",
-    "joel@vecchio-law.com",
-    "grandelaw@live.com",
-    "mhumble@rhodes-humble.com",
-}
-
-ALLOWED_SENDER_DOMAINS = {
-    "kplitigators.com",
-    "kksblaw.com",
-    "aavlawfirm.com",
-    "grittonlaw.com",
-    "brandpeters.com",
-    "kahnlawfirm.com",
-    "madialawfirm.com",
-    "foleygriffin.com",
-    "morganbourque.com",
-    "woodlandsattorneys.com",
-    "tedfordlaw.com",
-    "texascountrytitle.com",
-    "shanehinch.com",
-    "fortheworkers.com",
-    "ufkeslaw.com",
-    "webbstokessparks.com",
-    "amatteroflaw.com",
-    "edwardflintlawyer.com",
-    "jdsmithlaw.com",
-    "adllaw.org",
-    "davesautosarasota.com",
-    "longwelllawyers.com",
-    "perniklaw.com",
-    "vecchio-law.com",
-    "vecchioinjurylaw.com",
-    "rhodes-humble.com",
-    "awclawyer.com",
-    "fresnodefense.com",
-    "nh-lawyers.com",
-    "kaleitalawfirm.com",
-    "juliolawfirm.com",
-    "skierlawfirm.com",
-    "mccormackpc.com",
-    "snowlawfirm.com",
-    "grandelaw.com",
-    "frederickslaw.net",
-    "caworkinjurylaw.com",
-    "nathanmillerlaw.com",
-    "willislaw.com",
-    "restivolaw.com",
-    "lannenlawpllc.com"
-}
+# AUTO-REPLY CONFIG
+# ============================================================
+AUTO_REPLY_ENABLED = False
+AUTO_REPLY_TO = "primeadsdigital@gmail.com"
 
 
 # ============================================================
@@ -114,287 +116,910 @@ def normalize_sender(raw_sender):
 # ============================================================
 # PRIORITY DETECTION
 # ============================================================
-def detect_priority(subject, body):
-    text_data = f"{subject} {body}".lower()
-    if any(k in text_data for k in ["urgent", "asap", "critical"]):
-        return "High"
-    if any(k in text_data for k in ["important", "soon"]):
-        return "Medium"
-    return "Low"
+def detect_priority(subject, body, sender=None):
+    return priority_classifier.classify(subject, body, sender)
 
 
 # ============================================================
-# CREATE TICKET (SAFE + DEDUPLICATED)
+# CREATE TICKETS (SAFE + DEDUPLICATED, SET-BASED)
 # ============================================================
-def create_ticket(session, sender, subject, body, message_id):
-    #-------------------------------
-    # Prevent duplicate email
-    #-------------------------------
-    exists = session.execute(
-        text("SELECT id FROM tickets WHERE message_id = :mid LIMIT 1"),
-        {"mid": message_id}
-    ).fetchone()
-
-    if exists:
-        print(f"🔁 Duplicate email ignored (message_id={message_id})")
-        return None
+def reserve_ticket_ids(session, count):
+    """
+    Preallocates `count` consecutive ticket ids in ONE statement, so
+    ticket_code can be written by the INSERT itself (no UPDATE after
+    lastrowid). LAST_INSERT_ID(expr) hands the new value back in the
+    OK packet → result.lastrowid.
+    """
+    result = session.execute(
+        text("""
+            UPDATE ticket_sequence
+            SET next_id = LAST_INSERT_ID(next_id + :count)
+            WHERE name = 'tickets'
+        """),
+        {"count": count}
+    )
+    first_id = result.lastrowid - count
+    return list(range(first_id, first_id + count))
+
+
+def insert_tickets(session, parsed):
+    """
+    Inserts a batch of tickets + their notifications set-based:
+    id reservation, ONE multi-row INSERT, INSERT ... SELECT notification
+    fan-out (+ auto-reply queue). The caller bumps the tickets version
+    after committing (tickets_changed).
+    Already-stored message_ids were dropped by triage_pending; one
+    ingested concurrently fails the whole batch on the unique key and
+    persist_chunk then retries one by one.
+    Returns the ticket codes that were actually created.
+    Does NOT commit (caller controls transaction).
+    """
+    seen = set()
+    fresh = []
+    for p in parsed:
+        if p["message_id"] not in seen:
+            seen.add(p["message_id"])  # duplicates inside the same batch
+            fresh.append(p)
+
+    if not fresh:
+        return []
+
+    ids = reserve_ticket_ids(session, len(fresh))
+
+    rows = [
+        {
+            "id": ticket_id,
+            "code": f"TCK-{ticket_id:05d}",
+            "email": p["sender"],
+            "desc": p["body"],
+            "priority": p.get("priority") or detect_priority(p["subject"], p["body"], p["sender"]),
+            "mid": p["message_id"],
+        }
+        for ticket_id, p in zip(ids, fresh)
+    ]
+
+    # status / created_at / updated_at come from column defaults, so every
+    # VALUES slot is a placeholder and the driver sends ONE multi-row INSERT.
+    # No IGNORE: it would also swallow a PK clash (ticket_sequence behind
+    # MAX(id)) and the fan-out below would then notify about someone
+    # else's ticket.
+    session.execute(
+        text("""
+            INSERT INTO tickets
+            (id, ticket_code, email, description, priority, message_id)
+            VALUES
+            (:id, :code, :email, :desc, :priority, :mid)
+        """),
+        rows
+    )
 
-    try:
-        #-------------------------------
-        # Insert ticket
-        #-------------------------------
-        result = session.execute(
-            text("""
-                INSERT INTO tickets
-                (email, description, status, priority, message_id, created_at, updated_at)
-                VALUES
-                (:email, :desc, 'Open', :priority, :mid, NOW(), NOW())
-            """),
-            {
-                "email": sender,
-                "desc": body,
-                "priority": detect_priority(subject, body),
-                "mid": message_id
-            }
-        )
+    # 🔔 NOTIFY ADMINS + AGENTS (every id in the range was just inserted)
+    session.execute(
+        text("""
+            INSERT INTO notifications
+            (user_id, ticket_id, ticket_code, message, is_read, created_at)
+            SELECT u.id, t.id, t.ticket_code,
+                   CONCAT('New ticket created: ', t.ticket_code), 0, NOW()
+            FROM tickets t
+            JOIN users u ON u.role IN ('admin', 'agent')
+            WHERE t.id BETWEEN :first_id AND :last_id
+        """),
+        {"first_id": ids[0], "last_id": ids[-1]}
+    )
 
-        ticket_id = result.lastrowid
-        ticket_code = f"TCK-{ticket_id:05d}"
-
-        #-------------------------------
-        # Update ticket_code
-        #-------------------------------
-        session.execute(
-            text("""
-                UPDATE tickets
-                SET ticket_code = :code
-                WHERE id = :id
-            """),
-            {"code": ticket_code, "id": ticket_id}
-        )
+    if AUTO_REPLY_ENABLED:
+        queue_auto_replies(session, ids[0], ids[-1])
 
-        # 🔔 NOTIFY ADMINS + AGENTS
-        users = session.execute(
-            text("""
-                SELECT id
-                FROM users
-                WHERE role IN ('admin', 'agent')
-            """)
-        ).fetchall()
-
-        for user in users:
-            notify_user(
-                session,
-                user.id,
-                ticket_id,
-                ticket_code,
-                f"New ticket created: {ticket_code}"
-            )
+    return [r["code"] for r in rows]
 
+
+def create_ticket(session, sender, subject, body, message_id):
+    """
+    Creates ONE ticket in its own transaction (persist_chunk fallback).
+    Returns False only if the email could not be stored; a duplicate
+    message_id counts as handled.
+    """
+    try:
+        code = insert_tickets(session, [{
+            "sender": sender,
+            "subject": subject,
+            "body": body,
+            "message_id": message_id,
+        }])[0]
         session.commit()
+        tickets_changed(session)
 
-        print(f"✅ NEW TICKET CREATED: {ticket_code} from {sender}")
-        return ticket_code
+    except IntegrityError as e:
+        session.rollback()
+        if "message_id" not in str(e.orig):
+            print("❌ Ticket creation failed:", e)
+            return False
+        print(f"🔁 Duplicate email ignored (message_id={message_id})")
+        return True
 
     except Exception as e:
         session.rollback()
         print("❌ Ticket creation failed:", e)
+        return False
+
+    print(f"✅ NEW TICKET CREATED: {code} from {sender}")
+    return True
+
+# ============================================================
+# AUTO REPLY (QUEUED, SENT BY THE OUTBOX SENDER)
+# ============================================================
+AUTO_REPLY_BODY = """
+Hello,
+
+Thank you for contacting Leaders Support.
+
+We have received your request and created a support ticket.
+
+Ticket Number: {ticket_code}
+
+Our team will review your concern and get back to you shortly.
+You may reply to this email to add more information.
+
+Best regards,
+Leaders Support Team
+"""
+
+
+def queue_auto_replies(session, first_id, last_id):
+    """
+    Queues one auto-reply per ticket created in [first_id, last_id],
+    in the same transaction and with ONE statement.
+    Threaded to the original email via In-Reply-To / References.
+    """
+    before, after = AUTO_REPLY_BODY.split("{ticket_code}")
+
+    session.execute(
+        text("""
+            INSERT INTO email_outbox (recipient, subject, body, headers)
+            SELECT t.email,
+                   CONCAT('Re: Ticket ', t.ticket_code, ' received'),
+                   CONCAT(:before, t.ticket_code, :after),
+                   JSON_OBJECT(
+                       'In-Reply-To', t.message_id,
+                       'References', t.message_id,
+                       'Reply-To', :reply_to,
+                       'Auto-Submitted', 'auto-replied'
+                   )
+            FROM tickets t
+            WHERE t.id BETWEEN :first_id AND :last_id
+        """),
+        {
+            "before": before,
+            "after": after,
+            "reply_to": AUTO_REPLY_TO,
+            "first_id": first_id,
+            "last_id": last_id
+        }
+    )
+
+# ============================================================
+# PARSE HEADERS (NO DB ACCESS)
+# ============================================================
+def parse_headers(uid, raw_headers):
+    """
+    Turns the triage header fields into ticket fields (without body).
+    Returns None when the message must NOT become a ticket.
+    """
+    msg = email.message_from_bytes(raw_headers)
+
+    message_id = msg.get("Message-ID")
+    if not message_id:
+        message_id = f"fallback-{uid}"
+
+    sender = normalize_sender(msg.get("From"))
+
+    # 🚫 Ignore internal Leaders emails
+    if sender.endswith("@leaders.st"):
         return None
 
+    # ✅ Allow only approved senders or domains (incl. subdomains)
+    if not sender_allowlist.allows(sender):
+        return None
+
+    subject_raw, encoding = decode_header(msg.get("Subject") or "")[0]
+    subject = (
+        subject_raw.decode(encoding or "utf-8", errors="ignore")
+        if isinstance(subject_raw, bytes)
+        else subject_raw
+    )
+    subject = subject.strip() if subject else "(No Subject)"
+
+    # 🚫 Ignore replies & forwards
+    if (
+        msg.get("In-Reply-To")
+        or msg.get("References")
+        or subject.lower().startswith("re:")
+        or subject.lower().startswith("fw:")
+    ):
+        return None
+
+    return {
+        "uid": uid,
+        "sender": sender,
+        "subject": subject,
+        "message_id": message_id,
+    }
+
+
+# ============================================================
+# HEADER-FIRST TRIAGE (ONE FETCH FOR THE WHOLE PENDING SET)
+# ============================================================
+TRIAGE_HEADERS = "FROM SUBJECT MESSAGE-ID IN-REPLY-TO REFERENCES"
+
+
+def triage_pending(mail, session, uids, stats):
+    """
+    Fetches only the headers the filters need for every pending UID,
+    then applies sender/allowlist/reply filters and DB dedupe in bulk.
+    Returns {uid: ticket_fields} for the messages worth downloading.
+    """
+    # 🔐 Pick up allowlist / keyword edits without a restart
+    sender_allowlist.refresh(session)
+    priority_classifier.refresh(session)
+    session.rollback()  # end the read transaction
+
+    messages = uid_fetch(
+        mail, uids, f"(UID RFC822.SIZE BODY.PEEK[HEADER.FIELDS ({TRIAGE_HEADERS})])"
+    )
+    stats["round_trips"] += 1
+
+    survivors = {}
+    for uid in uids:
+        fields = messages.get(uid)
+        if not fields:
+            continue  # expunged between SEARCH and FETCH
+
+        raw_headers = fetch_item(fields, "BODY[HEADER.FIELDS") or b""
+        stats["full_bytes"] += int(fields.get("RFC822.SIZE") or 0)
+        stats["fetched_bytes"] += len(raw_headers)
+
+        try:
+            ticket_fields = parse_headers(uid, raw_headers)
+        except Exception as e:
+            print(f"⚠️ Could not parse UID {uid}:", e)
+            continue
+
+        if ticket_fields:
+            survivors[uid] = ticket_fields
+
+    if not survivors:
+        return survivors
+
+    # DB-level dedupe (one query for the whole pending set)
+    mids = list({f["message_id"] for f in survivors.values()})
+    seen = {
+        row.message_id
+        for row in session.execute(
+            text("SELECT message_id FROM tickets WHERE message_id IN :mids")
+            .bindparams(bindparam("mids", expanding=True)),
+            {"mids": mids}
+        )
+    }
+    session.rollback()  # end the read transaction
+
+    fresh = {}
+    for uid in sorted(survivors):
+        mid = survivors[uid]["message_id"]
+        if mid in seen:
+            continue
+        seen.add(mid)  # duplicates inside the same burst
+        fresh[uid] = survivors[uid]
+
+    return fresh
+
+
 # ============================================================
-# AUTO REPLY
+# FETCH TEXT BODIES (PARTIAL MIME FETCH)
 # ============================================================
-#def send_auto_reply(to_email, ticket_code, original_msg):
-#    import smtplib
-#    from email.mime.text import MIMEText
-#    from email.mime.multipart import MIMEMultipart
-#    import time
+def fetch_bodies(mail, parsed, stats):
+    """
+    Downloads ONLY the raw text part of each message, capped at
+    MAX_BODY_BYTES, instead of the whole RFC822 (attachments included).
+    One UID FETCH for the structures, then one per distinct MIME section.
+    Decoding happens later, in the parser pool.
+    """
+    structures = uid_fetch(mail, list(parsed), "(UID BODYSTRUCTURE)")
+    stats["round_trips"] += 1
+
+    by_section = {}
+    for uid, fields in parsed.items():
+        fields["raw"], fields["encoding"], fields["charset"] = b"", "", "utf-8"
+        part = find_text_part(structures.get(uid, {}).get("BODYSTRUCTURE"))
+        if part:
+            by_section.setdefault(part["section"], []).append((uid, part))
+
+    for section, entries in by_section.items():
+        messages = uid_fetch(
+            mail,
+            [uid for uid, _ in entries],
+            f"(UID BODY.PEEK[{section}]<0.{MAX_BODY_BYTES}>)"
+        )
+        stats["round_trips"] += 1
 
-#    print("📨 Preparing auto-reply...")
+        for uid, part in entries:
+            raw = fetch_item(messages.get(uid, {}), f"BODY[{section}]") or b""
+            stats["fetched_bytes"] += len(raw)
+            parsed[uid].update(
+                raw=raw, encoding=part["encoding"], charset=part["charset"]
+            )
+
+
+# ============================================================
+# PERSIST ONE BATCH (ONE TRANSACTION)
+# ============================================================
+def persist_chunk(session, parsed, checkpoint, checkpoint_uid):
+    """
+    Creates tickets for a batch of parsed emails (in UID order) and
+    advances the ingest checkpoint in ONE transaction.
+    Falls back to one-by-one creation if the batch fails, so a single
+    bad message can't block the rest of the burst; the checkpoint then
+    stops just below the first email that still failed.
+    Returns that email's UID, or None if everything was stored.
+    """
+    mailbox, uidvalidity = checkpoint
 
-#   try:
-#       # ⏳ Small delay prevents Gmail suppression
-#       time.sleep(3)
+    try:
+        started = time.monotonic()
+        statements = 0
+
+        # One per cursor call; the tickets executemany is sent as ONE
+        # multi-row INSERT (every VALUES slot is a placeholder)
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            nonlocal statements
+            statements += 1
+
+        connection = session.connection()
+        event.listen(connection, "before_cursor_execute", _count)
+        try:
+            codes = insert_tickets(session, parsed)
+            save_checkpoint(session, mailbox, uidvalidity, checkpoint_uid)
+        finally:
+            event.remove(connection, "before_cursor_execute", _count)
+        session.commit()
+        if codes:
+            tickets_changed(session)
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        for code in codes:
+            print(f"✅ NEW TICKET CREATED: {code}")
+        if codes:
+            print(
+                f"🧾 {len(codes)} ticket(s) persisted with {statements} statements "
+                f"({elapsed_ms / len(codes):.1f} ms/ticket)"
+            )
+        return None
 
-#       msg = MIMEMultipart()
-#       msg["From"] = "Leaders Support <danny.villanueva@leaders.st>"
-#       msg["To"] = to_email
-#       msg["Subject"] = f"Re: Ticket {ticket_code} received"
-#       msg["Reply-To"] = "primeadsdigital@gmail.com"
+    except Exception as e:
+        session.rollback()
+        if not parsed:
+            raise
+        print("⚠️ Batch insert failed, retrying one by one:", e)
 
-#        # 🔗 Reference original email (CRITICAL)
-#        if original_msg.get("Message-ID"):
-#            msg["In-Reply-To"] = original_msg.get("Message-ID")
-#            msg["References"] = original_msg.get("Message-ID")
+    failed_uid = None
+    for p in parsed:
+        if not create_ticket(
+            session, p["sender"], p["subject"], p["body"], p["message_id"]
+        ):
+            failed_uid = p["uid"]
+            break
 
-#        # ✅ Mark as auto-reply (but NOT bulk)
-#        msg["Auto-Submitted"] = "auto-replied"
+    if failed_uid is not None:
+        # Emails after it that were already stored are dropped by the
+        # dedupe in triage_pending when the range is fetched again
+        checkpoint_uid = failed_uid - 1
+        print(f"⚠️ [{mailbox}] Checkpoint held at UID {checkpoint_uid}")
 
-#        body = f"""
-#Hello,
+    save_checkpoint(session, mailbox, uidvalidity, checkpoint_uid)
+    session.commit()
+    return failed_uid
 
-#Thank you for contacting Leaders Support.
 
-#We have received your request and created a support ticket.
+# ============================================================
+# PIPELINE: STATE + METRICS
+# ============================================================
+class MailboxState:
+    """
+    Per-mailbox bookkeeping shared by its fetcher and writer.
+    - dispatched_uid: highest UID handed to the pipeline (the DB
+      checkpoint lags behind while chunks are in flight)
+    - generation: bumped on reconnect / write failure; in-flight
+      chunks from an older generation are dropped and re-fetched
+    - refetch: set by reset(); wakes the fetcher out of IDLE so the
+      dropped chunks are re-fetched without waiting for new mail
+      (reset(wake=False) leaves that to the next poll)
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.generation = 0
+        self.dispatched_uid = 0
+        self.refetch = threading.Event()
+
+    def reset(self, wake=True):
+        with self.lock:
+            self.generation += 1
+            self.dispatched_uid = 0
+        if wake:
+            self.refetch.set()
+
+
+class StageStats:
+    """
+    Per-stage latency (count / avg / max) for the ingest pipeline.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+
+    def record(self, stage, seconds):
+        with self.lock:
+            entry = self.stages.setdefault(stage, [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += seconds
+            entry[2] = max(entry[2], seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                stage: {
+                    "count": count,
+                    "avg_ms": round(total / count * 1000, 1),
+                    "max_ms": round(worst * 1000, 1),
+                }
+                for stage, (count, total, worst) in self.stages.items()
+            }
 
-#Ticket Number: {ticket_code}
 
-#Our team will review your concern and get back to you shortly.
-#You may reply to this email to add more information.
+parse_queue = queue.Queue(maxsize=PARSE_QUEUE_SIZE)
+persist_queues = [
+    queue.Queue(maxsize=PERSIST_QUEUE_SIZE)
+    for _ in range(max(1, flask_app.config.get("INGEST_DB_WRITERS", 2)))
+]
+stage_stats = StageStats()
+parser_pool = None
 
-#Best regards,
-#Leaders Support Team
-#"""
-#        msg.attach(MIMEText(body, "plain"))
 
-#        server = smtplib.SMTP("smtp.gmail.com", 587, timeout=20)
-#        server.ehlo()
-#        server.starttls()
-#        server.ehlo()
-#        server.login(SMTP_USER, SMTP_PASS)
+def pipeline_stats():
+    """
+    Queue depths + per-stage latency, for logs or a health endpoint.
+    """
+    return {
+        "queues": {
+            "parse": parse_queue.qsize(),
+            "persist": [q.qsize() for q in persist_queues],
+        },
+        "stages": stage_stats.snapshot(),
+    }
 
-#        server.sendmail(
-#            "primeadsdigital@gmail.com",
-#            to_email,
-#            msg.as_string()
-#        )
 
- #       server.quit()
- #       print(f"✅ Auto-reply delivered to {to_email}")
+def _stats_reporter():
+    last = None
+    while True:
+        time.sleep(STATS_INTERVAL_SECONDS)
+        stats = pipeline_stats()
+        if stats != last:
+            print(f"📊 Ingest pipeline: {stats}")
+            last = stats
 
-#    except Exception as e:
-#        print("❌ AUTO-REPLY FAILED")
-#        print(type(e).__name__, ":", e)
 
 # ============================================================
-# PROCESS LATEST EMAIL ONLY
+# STAGE 1: IMAP FETCHER (ONE PER MAILBOX)
 # ============================================================
-def process_latest_email(mail, session):
-    last_uid = get_last_uid()
+def process_pending_emails(mail, session, checkpoint, state):
+    """
+    Triage + partial fetch of every pending email, handed to the
+    parser stage in chunks. Blocks when the pipeline is full
+    (backpressure) instead of buffering unbounded mail in memory.
+    checkpoint = (mailbox, uidvalidity) of the SELECTed folder.
+    """
+    mailbox, uidvalidity = checkpoint
+
+    # Everything from the checkpoint up is re-read below, which covers
+    # any chunks dropped by a reset so far
+    state.refetch.clear()
+
+    last_uid = session.execute(
+        text("""
+            SELECT last_uid FROM ingest_checkpoints
+            WHERE mailbox = :mailbox AND uidvalidity = :uidvalidity
+        """),
+        {"mailbox": mailbox, "uidvalidity": uidvalidity}
+    ).scalar() or 0
+    session.rollback()  # end the read transaction
+
+    with state.lock:
+        generation = state.generation
+        last_uid = max(last_uid, state.dispatched_uid)
 
     # ONLY fetch emails newer than last UID
     result, data = mail.uid("search", None, f"(UID {last_uid + 1}:*)")
-    uids = data[0].split()
+    uids = [int(u) for u in data[0].split()]
+
+    # "N:*" always matches the newest message, even if N is past it
+    uids = sorted(u for u in uids if u > last_uid)
 
     if not uids:
-        return False
+        return 0
 
-    uid = uids[-1]  # newest ONLY
+    started = time.monotonic()
+    stats = {"round_trips": 0, "full_bytes": 0, "fetched_bytes": 0}
+
+    survivors = triage_pending(mail, session, uids, stats)
+    survivor_uids = list(survivors)
+    stage_stats.record("triage", time.monotonic() - started)
+
+    for i in range(0, max(len(survivor_uids), 1), INGEST_BATCH_SIZE):
+        chunk_started = time.monotonic()
+        chunk = survivor_uids[i:i + INGEST_BATCH_SIZE]
+        parsed = {uid: survivors[uid] for uid in chunk}
+
+        if parsed:
+            fetch_bodies(mail, parsed, stats)
+
+        # ✅ Advance checkpoint ONCE per chunk: everything below the
+        # next survivor was either persisted or rejected by triage
+        if i + INGEST_BATCH_SIZE < len(survivor_uids):
+            checkpoint_uid = survivor_uids[i + INGEST_BATCH_SIZE] - 1
+        else:
+            checkpoint_uid = uids[-1]
+
+        stage_stats.record("fetch", time.monotonic() - chunk_started)
+
+        parse_queue.put({
+            "state": state,
+            "generation": generation,
+            "checkpoint": checkpoint,
+            "checkpoint_uid": checkpoint_uid,
+            "items": list(parsed.values()),
+            "enqueued_at": time.monotonic(),
+        })
+
+        with state.lock:
+            if state.generation == generation:
+                state.dispatched_uid = max(state.dispatched_uid, checkpoint_uid)
+
+    elapsed = time.monotonic() - started
+    rate = len(uids) / elapsed if elapsed > 0 else float(len(uids))
+    print(
+        f"📥 [{mailbox}] Dispatched {len(uids)} email(s), {len(survivors)} to ingest, "
+        f"in {elapsed:.2f}s ({rate:.1f} msg/s)"
+    )
 
-    result, msg_data = mail.uid("fetch", uid, "(RFC822)")
-    msg = email.message_from_bytes(msg_data[0][1])
+    # Baseline = one full RFC822 fetch per pending message
+    print(
+        f"📉 Triage kept {len(survivors)}/{len(uids)}: "
+        f"saved {stats['full_bytes'] - stats['fetched_bytes']} bytes, "
+        f"{len(uids) - stats['round_trips']} round trip(s)"
+    )
 
-    message_id = msg.get("Message-ID")
-    if not message_id:
-        message_id = f"fallback-{uid.decode()}"
+    return len(survivors)
 
-    # DB-level dedupe
-    exists = session.execute(
-        text("SELECT 1 FROM tickets WHERE message_id = :mid"),
-        {"mid": message_id}
-    ).fetchone()
 
-    if exists:
-        save_last_uid(int(uid))
-        return False
+# ============================================================
+# STAGE 2: PARSER (MIME DECODING IN A PROCESS POOL)
+# ============================================================
+def replace_parser_pool(broken):
+    """
+    Swaps a broken parser pool (a worker was OOM-killed or crashed in a
+    codec) for a fresh one. Threads are running by now, so the new
+    workers come from a forkserver instead of fork().
+    """
+    global parser_pool
+
+    broken.shutdown(wait=False, cancel_futures=True)
+    parser_pool = ProcessPoolExecutor(
+        max_workers=PARSER_PROCESSES,
+        mp_context=multiprocessing.get_context("forkserver"),
+    )
+    print("♻️ Parser pool restarted")
+
+
+def decode_bodies(items):
+    """
+    Decodes the raw text parts of a chunk in the parser pool.
+    A broken pool is replaced and the chunk retried once.
+    """
+    args = (
+        [p.pop("raw") for p in items],
+        [p.pop("encoding") for p in items],
+        [p.pop("charset") for p in items],
+    )
 
-    sender = normalize_sender(msg.get("From"))
-    sender_domain = sender.split("@")[-1]
-    
-    # 🚫 Ignore internal Leaders emails
-    if sender.endswith("@leaders.st"):
-        save_last_uid(int(uid))
-        return False
-    
-    # ✅ Allow only approved senders or domains
-    if (
-        sender not in ALLOWED_SENDER_EMAILS
-        and sender_domain not in ALLOWED_SENDER_DOMAINS
-    ):
-        save_last_uid(int(uid))
-        return False
+    for attempt in range(2):
+        pool = parser_pool
+        try:
+            return list(pool.map(decode_part, *args))
+        except BrokenProcessPool:
+            if attempt:
+                raise
+            replace_parser_pool(pool)
 
-    subject_raw, encoding = decode_header(msg.get("Subject"))[0]
-    subject = (
-        subject_raw.decode(encoding or "utf-8", errors="ignore")
-        if isinstance(subject_raw, bytes)
-        else subject_raw
-    )
-    subject = subject.strip() if subject else "(No Subject)"
 
-    # 🚫 Ignore replies & forwards
-    if (
-        msg.get("In-Reply-To")
-        or msg.get("References")
-        or subject.lower().startswith("re:")
-        or subject.lower().startswith("fw:")
-    ):
-        save_last_uid(int(uid))
+def parser_stage():
+    with flask_app.app_context():
+        while True:
+            job = parse_queue.get()
+            started = time.monotonic()
+
+            try:
+                items = job["items"]
+                if items:
+                    bodies = decode_bodies(items)
+                    for p, body in zip(items, bodies):
+                        p["body"] = truncate_utf8(body, MAX_DESCRIPTION_BYTES) or "(No content)"
+                        p["priority"] = detect_priority(p["subject"], p["body"], p["sender"])
+
+            except Exception as e:
+                print(f"⚠️ [{job['state'].name}] Parse stage failed:", e)
+                job["state"].reset()
+                continue
+
+            stage_stats.record("parse", time.monotonic() - started)
+
+            # Same mailbox → same writer, so its chunks commit in order
+            index = zlib.crc32(job["state"].name.encode()) % len(persist_queues)
+            persist_queues[index].put(job)
+
+
+# ============================================================
+# STAGE 3: BATCHING DB WRITER
+# ============================================================
+def writer_stage(jobs):
+    with flask_app.app_context():
+        session = flask_app.session()
+
+        while True:
+            batch = [jobs.get()]
+
+            # Coalesce whatever else is already waiting
+            while sum(len(j["items"]) for j in batch) < WRITER_MAX_TICKETS:
+                try:
+                    batch.append(jobs.get_nowait())
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for job in batch:
+                state = job["state"]
+                if job["generation"] != state.generation:
+                    continue  # superseded by a reset, will be re-fetched
+                groups.setdefault(state, []).append(job)
+
+            for state, group in groups.items():
+                started = time.monotonic()
+                try:
+                    failed_uid = persist_chunk(
+                        session,
+                        [p for job in group for p in job["items"]],
+                        group[-1]["checkpoint"],
+                        group[-1]["checkpoint_uid"],
+                    )
+                except Exception as e:
+                    session.rollback()
+                    print(f"❌ [{state.name}] Persist failed, re-fetching:", e)
+                    state.reset()
+                    continue
+
+                if failed_uid is not None:
+                    # Later chunks must not move the checkpoint past it;
+                    # retried on the next poll / new mail, not right away
+                    state.reset(wake=False)
+
+                finished = time.monotonic()
+                stage_stats.record("persist", finished - started)
+                for job in group:
+                    stage_stats.record("end_to_end", finished - job["enqueued_at"])
+
+
+# ============================================================
+# IMAP SESSION
+# ============================================================
+def connect_mailbox(cfg):
+    if cfg.ssl:
+        mail = imaplib.IMAP4_SSL(cfg.host, cfg.port)
+    else:
+        mail = imaplib.IMAP4(cfg.host, cfg.port)
+    mail.login(cfg.user, cfg.password)
+    mail.select(cfg.folder)
+    return mail
+
+
+def open_checkpoint(mail, session, cfg):
+    """
+    Reads UIDVALIDITY/UIDNEXT from the SELECT response and makes sure
+    the mailbox has a checkpoint row. Returns (mailbox, uidvalidity).
+    """
+    mailbox = f"{cfg.user}/{cfg.folder}"
+
+    _, data = mail.response("UIDVALIDITY")
+    uidvalidity = int(data[0])
+
+    _, data = mail.response("UIDNEXT")
+    if data and data[0]:
+        uidnext = int(data[0])
+    else:
+        _, found = mail.uid("search", None, "ALL")
+        uids = found[0].split()
+        uidnext = int(uids[-1]) + 1 if uids else 1
+
+    # last_uid.txt only ever tracked the original account's INBOX
+    legacy_mailbox = cfg.user == EMAIL_USER and cfg.folder == IMAP_FOLDER
+
+    load_checkpoint(session, mailbox, uidvalidity, uidnext, legacy_mailbox)
+    return mailbox, uidvalidity
+
+
+def _read_idle_line(mail):
+    """
+    Reads one line while in IDLE.
+    Returns None when nothing arrived within IDLE_POLL_SECONDS.
+    """
+    try:
+        return mail.readline()
+    except socket.timeout:
+        # A timed-out socket file refuses further reads; the buffer is
+        # empty at this point, so a fresh file on the same socket is safe.
+        mail.file.close()
+        mail.file = mail.sock.makefile("rb")
+        return None
+
+
+def idle_wait(mail, max_seconds, wake=None):
+    """
+    Stays in IDLE until the server reports new mail, max_seconds
+    passes (servers drop IDLE after 29 minutes) or the `wake` event is
+    set (checked every IDLE_POLL_SECONDS).
+    Returns True when an EXISTS response was seen.
+    """
+    if wake is not None and wake.is_set():
         return False
 
-    body = ""
-    if msg.is_multipart():
-        for part in msg.walk():
-            if part.get_content_type() == "text/plain":
-                body = part.get_payload(decode=True).decode(errors="ignore")
+    # "* N EXISTS" sent during the last UID SEARCH / FETCH was filed
+    # by imaplib and won't be repeated inside IDLE
+    if mail.untagged_responses.pop("EXISTS", None):
+        return True
+
+    tag = mail._new_tag()
+    mail.sock.settimeout(IDLE_POLL_SECONDS)
+    mail.send(tag + b" IDLE\r\n")
+
+    new_mail = False
+
+    line = mail.readline()
+    while line.startswith(b"* "):
+        # untagged data queued before IDLE
+        if re.match(rb"\* \d+ EXISTS", line):
+            new_mail = True
+        line = mail.readline()
+    if not line.startswith(b"+"):
+        mail.tagged_commands.pop(tag, None)
+        raise imaplib.IMAP4.abort(f"IDLE rejected: {line!r}")
+
+    deadline = time.monotonic() + max_seconds
+
+    try:
+        while not new_mail and time.monotonic() < deadline:
+            line = _read_idle_line(mail)
+            if line is None:
+                if wake is not None and wake.is_set():
+                    break  # pipeline dropped chunks: re-fetch them
+                continue  # quiet mailbox, keep idling
+
+            if not line:
+                raise imaplib.IMAP4.abort("IMAP connection closed during IDLE")
+
+            if re.match(rb"\* \d+ EXISTS", line):
+                new_mail = True
                 break
-    else:
-        body = msg.get_payload(decode=True).decode(errors="ignore")
 
-    if not body:
-        body = "(No content)"
+            if line.startswith(b"* BYE"):
+                raise imaplib.IMAP4.abort(f"Server closed IDLE: {line!r}")
 
-    ticket_code = create_ticket(session, sender, subject, body, message_id)
+            # "* n EXPUNGE" / "* n FETCH" only shift sequence numbers;
+            # ingestion is UID based, so nothing to do.
 
-#  (Auto-reply optional — currently commented in your code)
-#    if ticket_code:
-#        send_auto_reply(sender, ticket_code, msg)
+    finally:
+        # Exit IDLE cleanly + drain until the tagged completion
+        mail.send(b"DONE\r\n")
 
-    save_last_uid(int(uid))
-    return True
+    while True:
+        line = _read_idle_line(mail)
+        if line is None:
+            raise imaplib.IMAP4.abort("No IDLE completion from server")
+        if not line:
+            raise imaplib.IMAP4.abort("IMAP connection closed during IDLE")
+        if line.startswith(tag):
+            mail.tagged_commands.pop(tag, None)
+            if b" OK" not in line:
+                raise imaplib.IMAP4.abort(f"IDLE failed: {line!r}")
+            break
+        if re.match(rb"\* \d+ EXISTS", line):
+            new_mail = True
+
+    return new_mail
 
 
 # ============================================================
-# IMAP IDLE LOOP (STABLE)
+# IMAP IDLE LOOP (ONE PERSISTENT SESSION PER MAILBOX)
 # ============================================================
-def idle_listener():
+def mailbox_listener(cfg):
+    state = MailboxState(cfg.name)
+
     with flask_app.app_context():
         session = flask_app.session()
         backoff = 5
 
-        print("📩 Waiting for NEW incoming email...")
+        print(f"📩 [{cfg.name}] Waiting for NEW incoming email...")
 
         while True:
+            mail = None
             try:
-                mail = imaplib.IMAP4_SSL(IMAP_HOST)
-                mail.login(EMAIL_USER, EMAIL_PASS)
-                mail.select("INBOX")
-
-                # Enter IDLE
-                mail.send(b"IDLE\r\n")
+                mail = connect_mailbox(cfg)
+                checkpoint = open_checkpoint(mail, session, cfg)
+                state.reset()  # UIDVALIDITY may have changed
+                backoff = 5
 
-                try:
-                    line = mail.readline()  # block quietly
+                # 🔑 Drain anything that arrived while disconnected
+                process_pending_emails(mail, session, checkpoint, state)
 
-                except socket.timeout:
-                    pass  # normal Gmail behavior
+                while True:
+                    # Re-IDLE in place; only a real failure reconnects.
+                    # Check for pending mail after EVERY return (one cheap
+                    # UID SEARCH): a renewal can race a delivery too.
+                    idle_wait(mail, IDLE_RENEW_SECONDS, state.refetch)
+                    process_pending_emails(mail, session, checkpoint, state)
 
-                finally:
-                    # Exit IDLE cleanly
-                    mail.send(b"DONE\r\n")
+            except Exception as e:
+                print(f"🔄 [{cfg.name}] IMAP reconnect: {e}")
+                session.rollback()
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 120)
 
-                # 🔑 ALWAYS check UNSEEN once after IDLE exits
-                processed = process_latest_email(mail, session)
+            finally:
+                if mail is not None:
+                    try:
+                        mail.logout()
+                    except Exception:
+                        pass
 
-                mail.logout()
 
-                if processed:
-                    time.sleep(2)  # small cooldown after success
+def idle_listener():
+    """
+    Watches every configured mailbox concurrently (one thread each),
+    each with its own IMAP session, checkpoint and backoff, feeding
+    the shared parser pool and DB writers.
+    """
+    global parser_pool
+
+    # Fork the parser processes before any thread exists
+    parser_pool = ProcessPoolExecutor(max_workers=PARSER_PROCESSES)
+    list(parser_pool.map(abs, range(PARSER_PROCESSES)))
+
+    workers = [(parser_stage, ()), (_stats_reporter, ())]
+    workers += [(writer_stage, (jobs,)) for jobs in persist_queues]
+    for target, args in workers:
+        threading.Thread(target=target, args=args, daemon=True).start()
+
+    threads = []
+    for cfg in load_mailboxes():
+        thread = threading.Thread(
+            target=mailbox_listener,
+            args=(cfg,),
+            name=f"imap-{cfg.name}",
+            daemon=True,
+        )
+        thread.start()
+        threads.append(thread)
 
-            except Exception as e:
-                print(f"🔄 IMAP reconnect: {e}")
-                time.sleep(backoff)
-                backoff = min(backoff * 2, 120)
+    for thread in threads:
+        thread.join()
 
 
 # ============================================================
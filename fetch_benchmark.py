@@ -0,0 +1,161 @@
+import email
+import os
+import random
+import sys
+import time
+import tracemalloc
+from email.mime.application import MIMEApplication
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from app.utils.imap_fetch import parse_fetch_response, find_text_part, decode_part, truncate_utf8
+
+# Micro-benchmark: full RFC822 fetch + parse (old) vs BODYSTRUCTURE +
+# capped text part (email_listener.fetch_bodies) on large multipart mail.
+# No IMAP server needed: the server's side is simulated, bytes on the
+# wire are counted and turned into a transfer time at LINK_MBIT.
+#   python fetch_benchmark.py [emails] [attachment_mb] [link_mbit]
+
+EMAILS = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+ATTACHMENT_MB = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+LINK_MBIT = float(sys.argv[3]) if len(sys.argv) > 3 else 50
+
+# Same caps as email_listener.py
+MAX_BODY_BYTES = 64 * 1024
+MAX_DESCRIPTION_BYTES = 65535
+
+
+# ============================================================
+# CORPUS (TEXT + SCANNED PDF / SCREENSHOT ATTACHMENTS)
+# ============================================================
+def make_message(rng):
+    msg = MIMEMultipart("mixed")
+    msg["From"] = "paralegal@grandelaw.com"
+    msg["Subject"] = "Records for hearing"
+    msg["Message-ID"] = f"<{rng.getrandbits(64)}@grandelaw.com>"
+
+    alternative = MIMEMultipart("alternative")
+    text = "Please find the records attached. Café résumé — see below.\n" * rng.randint(20, 200)
+    alternative.attach(MIMEText(text, "plain", "utf-8"))
+    alternative.attach(MIMEText(f"<html><body><p>{text}</p></body></html>", "html", "utf-8"))
+    msg.attach(alternative)
+
+    remaining = int(ATTACHMENT_MB * 1024 * 1024)
+    index = 0
+    while remaining > 0:
+        size = min(remaining, rng.randint(256, 2048) * 1024)
+        part = MIMEApplication(os.urandom(size), "pdf")
+        part.add_header("Content-Disposition", "attachment", filename=f"exhibit_{index}.pdf")
+        msg.attach(part)
+        remaining -= size
+        index += 1
+
+    return msg.as_bytes()
+
+
+def _q(value):
+    return b"NIL" if value is None else b'"' + value.encode() + b'"'
+
+
+def bodystructure(part):
+    """IMAP BODYSTRUCTURE of a parsed message (what the server would send)."""
+    if part.is_multipart():
+        children = b"".join(bodystructure(p) for p in part.get_payload())
+        return b"(" + children + b" " + _q(part.get_content_subtype().upper()) + b")"
+
+    payload = part.get_payload().encode()
+    params = [f'"{k.upper()}" "{v}"' for k, v in part.get_params()[1:]]
+    return b"(" + b" ".join([
+        _q(part.get_content_maintype().upper()),
+        _q(part.get_content_subtype().upper()),
+        ("(" + " ".join(params) + ")").encode() if params else b"NIL",
+        b"NIL", b"NIL",
+        _q((part.get("Content-Transfer-Encoding") or "7bit").upper()),
+        str(len(payload)).encode(),
+    ]) + b")"
+
+
+def text_section(msg, section):
+    """Raw (undecoded) bytes of a section, capped like BODY.PEEK[n]<0.cap>."""
+    part = msg
+    for number in section.split("."):
+        part = part.get_payload()[int(number) - 1]
+    return part.get_payload().encode()[:MAX_BODY_BYTES]
+
+
+# ============================================================
+# THE TWO CODE PATHS
+# ============================================================
+def old_path(raw_message):
+    msg = email.message_from_bytes(raw_message)
+    body = ""
+    for part in msg.walk():
+        if part.get_content_type() == "text/plain":
+            body = part.get_payload(decode=True).decode(errors="ignore")
+            break
+    return body
+
+
+def new_path(structure_response, raw_section):
+    fields = parse_fetch_response([structure_response])[0]
+    info = find_text_part(fields["BODYSTRUCTURE"])
+    body = decode_part(raw_section, info["encoding"], info["charset"])
+    return truncate_utf8(body, MAX_DESCRIPTION_BYTES)
+
+
+def measure(fn, inputs):
+    started = time.perf_counter()
+    for args in inputs:
+        fn(*args)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    for args in inputs:
+        fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+rng = random.Random(42)
+messages = [make_message(rng) for _ in range(EMAILS)]
+
+new_inputs = []
+for raw in messages:
+    msg = email.message_from_bytes(raw)
+    structure = b"1 (UID 1 BODYSTRUCTURE " + bodystructure(msg) + b")"
+    section = find_text_part(parse_fetch_response([structure])[0]["BODYSTRUCTURE"])["section"]
+    new_inputs.append((structure, text_section(msg, section)))
+
+old_bytes = sum(len(m) for m in messages)
+new_bytes = sum(len(s) + len(t) for s, t in new_inputs)
+
+old_time, old_peak = measure(old_path, [(m,) for m in messages])
+new_time, new_peak = measure(new_path, new_inputs)
+
+same = sum(
+    truncate_utf8(old_path(m), MAX_DESCRIPTION_BYTES)[:1000] == new_path(*n)[:1000]
+    for m, n in zip(messages, new_inputs)
+)
+
+
+def wire_seconds(nbytes):
+    return nbytes * 8 / (LINK_MBIT * 1_000_000)
+
+
+print(f"Corpus: {EMAILS} emails, {old_bytes / EMAILS / 1024 / 1024:.1f} MB avg (text + PDF attachments)")
+print(f"{'':<10} {'on wire':>12} {'transfer':>10} {'parse':>10} {'peak mem':>10}")
+for label, nbytes, elapsed, peak in (
+    ("RFC822", old_bytes, old_time, old_peak),
+    ("partial", new_bytes, new_time, new_peak),
+):
+    print(
+        f"{label:<10} {nbytes / 1024:>9.0f} KB {wire_seconds(nbytes) / EMAILS * 1000:>7.1f} ms"
+        f" {elapsed / EMAILS * 1000:>7.2f} ms {peak / 1024 / 1024:>7.1f} MB"
+    )
+print(
+    f"Per email at {LINK_MBIT:g} Mbit/s: "
+    f"{(wire_seconds(old_bytes) + old_time) / EMAILS * 1000:.1f} ms → "
+    f"{(wire_seconds(new_bytes) + new_time) / EMAILS * 1000:.1f} ms; "
+    f"same body for {same}/{EMAILS} emails"
+)
@@ -0,0 +1,155 @@
+import os
+import re
+import sys
+from sqlalchemy import text
+from app import create_app
+from app.utils.query_plans import check_query_plans, LARGE_TABLE_ROWS
+
+# Usage:
+#   python migrate.py                           apply pending migrations, in order
+#   python migrate.py --status                  list applied / pending migrations
+#   python migrate.py --check-plans [min_rows]  EXPLAIN the app's queries,
+#                                               exit 1 on large full scans or
+#                                               INSERTs executemany can't batch
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+
+# MySQL DDL auto-commits, so a migration that failed halfway can't be
+# rolled back: schema_migration_progress records how many of its
+# statements finished, and a re-run continues with the next one.
+# No error is ever skipped.
+
+
+def discover():
+    return sorted(
+        f[:-4] for f in os.listdir(MIGRATIONS_DIR)
+        if re.match(r"^\d{4}_\w+\.sql$", f)
+    )
+
+
+def split_statements(sql):
+    # Statements end with ";" at end of line (triggers here are single-statement)
+    lines = [l for l in sql.splitlines() if not l.strip().startswith("--")]
+    return [s.strip() for s in re.split(r";\s*$", "\n".join(lines), flags=re.M) if s.strip()]
+
+
+def ensure_table(session):
+    session.execute(
+        text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version VARCHAR(255) NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (version)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+    )
+    session.execute(
+        text("""
+            CREATE TABLE IF NOT EXISTS schema_migration_progress (
+                version VARCHAR(255) NOT NULL,
+                statements_done INT NOT NULL,
+                PRIMARY KEY (version)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+    )
+    session.commit()
+
+
+def applied_versions(session):
+    return {
+        r.version for r in session.execute(
+            text("SELECT version FROM schema_migrations")
+        ).fetchall()
+    }
+
+
+def apply(session, version):
+    with open(os.path.join(MIGRATIONS_DIR, f"{version}.sql"), encoding="utf-8") as f:
+        statements = split_statements(f.read())
+
+    done = session.execute(
+        text("SELECT statements_done FROM schema_migration_progress WHERE version = :v"),
+        {"v": version}
+    ).scalar() or 0
+
+    if done:
+        print(f"   ↪ resuming after statement {done}/{len(statements)}")
+
+    for number, statement in enumerate(statements[done:], start=done + 1):
+        try:
+            session.execute(text(statement))
+        except Exception:
+            session.rollback()
+            print(
+                f"❌ {version}: statement {number}/{len(statements)} failed.\n"
+                f"   Fix the cause and re-run; statements 1-{number - 1} won't run again."
+            )
+            raise
+
+        # Same transaction as DML statements; right after DDL (auto-committed)
+        session.execute(
+            text("""
+                INSERT INTO schema_migration_progress (version, statements_done)
+                VALUES (:v, :n)
+                ON DUPLICATE KEY UPDATE statements_done = VALUES(statements_done)
+            """),
+            {"v": version, "n": number}
+        )
+        session.commit()
+
+    session.execute(
+        text("INSERT INTO schema_migrations (version) VALUES (:v)"),
+        {"v": version}
+    )
+    session.execute(
+        text("DELETE FROM schema_migration_progress WHERE version = :v"),
+        {"v": version}
+    )
+    session.commit()
+
+
+def main(args):
+    app = create_app()
+
+    if "--check-plans" in args:
+        rest = args[args.index("--check-plans") + 1:]
+        min_rows = int(rest[0]) if rest and rest[0].isdigit() else LARGE_TABLE_ROWS
+
+        problems = check_query_plans(app, min_rows)
+        for p in problems:
+            print(f"❌ {p}")
+        print(
+            f"✅ No full scans of {min_rows}+ rows" if not problems
+            else f"{len(problems)} problem(s)"
+        )
+        return 1 if problems else 0
+
+    session = app.session()
+
+    try:
+        ensure_table(session)
+        done = applied_versions(session)
+        pending = [v for v in discover() if v not in done]
+
+        if "--status" in args:
+            for v in discover():
+                print(f"{'✅' if v in done else '⏳'} {v}")
+            return 0
+
+        if not pending:
+            print("✅ Schema is up to date")
+            return 0
+
+        for version in pending:
+            print(f"⏳ Applying {version}")
+            apply(session, version)
+            print(f"✅ Applied {version}")
+
+        return 0
+
+    finally:
+        session.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,168 @@
+-- Email listener: checkpoints, ticket id blocks, allowlist + keyword tables
+
+-- -----------------------------------------------------
+-- TICKETS: updated_at STARTS AT CREATION
+-- -----------------------------------------------------
+ALTER TABLE tickets
+    MODIFY updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP;
+
+
+-- -----------------------------------------------------
+-- TICKET ID SEQUENCE (PREALLOCATED BY THE EMAIL LISTENER)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS ticket_sequence (
+    name VARCHAR(32) NOT NULL,
+
+    -- Next free tickets.id (reserved in blocks, so ticket_code is set on INSERT)
+    next_id INT NOT NULL,
+
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO ticket_sequence (name, next_id)
+SELECT 'tickets', COALESCE(MAX(id), 0) + 1 FROM tickets;
+
+
+-- -----------------------------------------------------
+-- EMAIL INGEST CHECKPOINTS (ONE ROW PER MAILBOX)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS ingest_checkpoints (
+    mailbox VARCHAR(255) NOT NULL,
+
+    -- 📬 IMAP UIDs are only valid within one UIDVALIDITY
+    uidvalidity BIGINT UNSIGNED NOT NULL,
+    last_uid BIGINT UNSIGNED NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (mailbox)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- -----------------------------------------------------
+-- CONFIG VERSION COUNTERS (IN-PROCESS CACHE INVALIDATION)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS config_versions (
+    name VARCHAR(64) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT IGNORE INTO config_versions (name, version) VALUES
+    ('sender_allowlist', 1),
+    ('priority_keywords', 1);
+
+
+-- -----------------------------------------------------
+-- SENDER ALLOWLIST (EMAIL LISTENER)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS sender_allowlist (
+    id INT NOT NULL AUTO_INCREMENT,
+
+    -- 'domain' also matches subdomains (mail.example.com)
+    kind ENUM('email','domain') NOT NULL,
+    value VARCHAR(255) NOT NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_sender_allowlist (kind, value)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 🔄 Any edit bumps the version → listener reloads without restart
+CREATE TRIGGER trg_sender_allowlist_ins AFTER INSERT ON sender_allowlist
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'sender_allowlist';
+
+CREATE TRIGGER trg_sender_allowlist_upd AFTER UPDATE ON sender_allowlist
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'sender_allowlist';
+
+CREATE TRIGGER trg_sender_allowlist_del AFTER DELETE ON sender_allowlist
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'sender_allowlist';
+
+INSERT IGNORE INTO sender_allowlist (kind, value) VALUES
+    ('email', 'specialedflint@gmail.com'),
+    ('email', 'joel@vecchio-law.com'),
+    ('email', 'grandelaw@live.com'),
+    ('email', 'mhumble@rhodes-humble.com'),
+    ('domain', 'kplitigators.com'),
+    ('domain', 'kksblaw.com'),
+    ('domain', 'aavlawfirm.com'),
+    ('domain', 'grittonlaw.com'),
+    ('domain', 'brandpeters.com'),
+    ('domain', 'kahnlawfirm.com'),
+    ('domain', 'madialawfirm.com'),
+    ('domain', 'foleygriffin.com'),
+    ('domain', 'morganbourque.com'),
+    ('domain', 'woodlandsattorneys.com'),
+    ('domain', 'tedfordlaw.com'),
+    ('domain', 'texascountrytitle.com'),
+    ('domain', 'shanehinch.com'),
+    ('domain', 'fortheworkers.com'),
+    ('domain', 'ufkeslaw.com'),
+    ('domain', 'webbstokessparks.com'),
+    ('domain', 'amatteroflaw.com'),
+    ('domain', 'edwardflintlawyer.com'),
+    ('domain', 'jdsmithlaw.com'),
+    ('domain', 'adllaw.org'),
+    ('domain', 'davesautosarasota.com'),
+    ('domain', 'longwelllawyers.com'),
+    ('domain', 'perniklaw.com'),
+    ('domain', 'vecchio-law.com'),
+    ('domain', 'vecchioinjurylaw.com'),
+    ('domain', 'rhodes-humble.com'),
+    ('domain', 'awclawyer.com'),
+    ('domain', 'fresnodefense.com'),
+    ('domain', 'nh-lawyers.com'),
+    ('domain', 'kaleitalawfirm.com'),
+    ('domain', 'juliolawfirm.com'),
+    ('domain', 'skierlawfirm.com'),
+    ('domain', 'mccormackpc.com'),
+    ('domain', 'snowlawfirm.com'),
+    ('domain', 'grandelaw.com'),
+    ('domain', 'frederickslaw.net'),
+    ('domain', 'caworkinjurylaw.com'),
+    ('domain', 'nathanmillerlaw.com'),
+    ('domain', 'willislaw.com'),
+    ('domain', 'restivolaw.com'),
+    ('domain', 'lannenlawpllc.com');
+
+
+-- -----------------------------------------------------
+-- PRIORITY KEYWORDS (EMAIL LISTENER CLASSIFIER)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS priority_keywords (
+    id INT NOT NULL AUTO_INCREMENT,
+
+    -- Case-insensitive substring of subject / body prefix
+    phrase VARCHAR(100) NOT NULL,
+    priority ENUM('High','Medium') NOT NULL,
+
+    -- A level wins once its matched weights add up to 1.0 (0 = disabled)
+    weight DECIMAL(5,2) NOT NULL DEFAULT 1.00,
+
+    -- NULL = all clients, otherwise overrides for that domain (+ subdomains)
+    client_domain VARCHAR(255) NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_priority_keyword (phrase, client_domain)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TRIGGER trg_priority_keywords_ins AFTER INSERT ON priority_keywords
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'priority_keywords';
+
+CREATE TRIGGER trg_priority_keywords_upd AFTER UPDATE ON priority_keywords
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'priority_keywords';
+
+CREATE TRIGGER trg_priority_keywords_del AFTER DELETE ON priority_keywords
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'priority_keywords';
+
+INSERT IGNORE INTO priority_keywords (phrase, priority, weight) VALUES
+    ('urgent', 'High', 1.00),
+    ('asap', 'High', 1.00),
+    ('critical', 'High', 1.00),
+    ('important', 'Medium', 1.00),
+    ('soon', 'Medium', 1.00);
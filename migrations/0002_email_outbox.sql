@@ -0,0 +1,30 @@
+-- Outbound mail goes through a durable queue
+
+-- -----------------------------------------------------
+-- OUTBOUND EMAIL QUEUE (SENT BY THE BACKGROUND SENDER)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS email_outbox (
+    id INT NOT NULL AUTO_INCREMENT,
+
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    html MEDIUMTEXT NULL,
+    body MEDIUMTEXT NULL,
+    sender VARCHAR(255) NULL,
+
+    -- JSON object of extra headers (In-Reply-To, Auto-Submitted, ...)
+    headers TEXT NULL,
+
+    status ENUM('pending','sending','sent','failed') NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+
+    -- ⏱ Retry time (pending) or lease expiry (sending)
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error VARCHAR(500) NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP NULL,
+
+    PRIMARY KEY (id),
+    KEY idx_email_outbox_due (status, next_attempt_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -0,0 +1,33 @@
+-- Dashboard FULLTEXT search + materialized SLA deadlines
+
+-- -----------------------------------------------------
+-- TICKETS: SEARCH INDEX
+-- -----------------------------------------------------
+ALTER TABLE tickets
+    ADD FULLTEXT KEY ft_tickets_search (ticket_code, email, description);
+
+
+-- -----------------------------------------------------
+-- TICKETS: SLA DEADLINES (app/utils/sla.py)
+-- -----------------------------------------------------
+ALTER TABLE tickets
+    ADD COLUMN warn_at TIMESTAMP NULL AFTER sla_hours,
+    ADD COLUMN due_at TIMESTAMP NULL AFTER warn_at,
+    ADD KEY idx_tickets_status_due (status, due_at),
+    ADD KEY idx_tickets_status_warn (status, warn_at);
+
+-- ⏱ The ONE place the SLA rule lives: deadlines follow priority
+CREATE TRIGGER trg_tickets_sla_ins BEFORE INSERT ON tickets
+    FOR EACH ROW SET
+        NEW.sla_hours = CASE NEW.priority WHEN 'High' THEN 24 WHEN 'Medium' THEN 48 ELSE 72 END,
+        NEW.due_at = COALESCE(NEW.created_at, NOW()) + INTERVAL NEW.sla_hours HOUR,
+        NEW.warn_at = COALESCE(NEW.created_at, NOW()) + INTERVAL NEW.sla_hours * 48 MINUTE;
+
+CREATE TRIGGER trg_tickets_sla_upd BEFORE UPDATE ON tickets
+    FOR EACH ROW SET
+        NEW.sla_hours = CASE NEW.priority WHEN 'High' THEN 24 WHEN 'Medium' THEN 48 ELSE 72 END,
+        NEW.due_at = NEW.created_at + INTERVAL NEW.sla_hours HOUR,
+        NEW.warn_at = NEW.created_at + INTERVAL NEW.sla_hours * 48 MINUTE;
+
+-- Backfill through the update trigger (keep updated_at as it was)
+UPDATE tickets SET updated_at = updated_at;
@@ -0,0 +1,29 @@
+-- Composite indexes for the hot dashboard / notification / notes queries
+-- (checked by: python migrate.py --check-plans)
+
+-- -----------------------------------------------------
+-- TICKETS
+-- -----------------------------------------------------
+-- Unfiltered dashboard page: keyset on (created_at, id)
+-- Status filters (+ page): (status, created_at)
+-- Agent scope (+ status filter, + page): (assigned_to, status, created_at)
+--   also replaces the implicit index behind fk_ticket_assigned_agent
+ALTER TABLE tickets
+    ADD KEY idx_tickets_created (created_at),
+    ADD KEY idx_tickets_status_created (status, created_at),
+    ADD KEY idx_tickets_assigned_status_created (assigned_to, status, created_at);
+
+
+-- -----------------------------------------------------
+-- NOTIFICATIONS: unread bell + count per user, newest first
+-- -----------------------------------------------------
+ALTER TABLE notifications
+    ADD KEY idx_notifications_user_read_created (user_id, is_read, created_at);
+
+
+-- -----------------------------------------------------
+-- TICKET NOTES: system activity flag + notes per ticket, newest first
+-- -----------------------------------------------------
+ALTER TABLE ticket_notes
+    ADD COLUMN is_system TINYINT(1) NOT NULL DEFAULT 0 AFTER note,
+    ADD KEY idx_ticket_notes_ticket_created (ticket_id, created_at);
@@ -0,0 +1,51 @@
+-- Daily ticket rollup for charts / trends, kept current by triggers
+
+-- -----------------------------------------------------
+-- DAILY TICKET ROLLUP (CHARTS + TRENDS)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS ticket_daily_rollup (
+    -- DATE(tickets.created_at)
+    day DATE NOT NULL,
+    priority ENUM('High','Medium','Low') NOT NULL,
+    status ENUM('Open','In Progress','Resolved') NOT NULL,
+
+    -- 👤 tickets.assigned_to (0 = unassigned: part of the primary key)
+    agent_id INT NOT NULL DEFAULT 0,
+
+    total INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (day, priority, status, agent_id),
+    KEY idx_rollup_agent_day (agent_id, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 📊 Move each ticket between buckets as it changes (app/utils/rollup.py)
+CREATE TRIGGER trg_tickets_rollup_ins AFTER INSERT ON tickets
+    FOR EACH ROW INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+        VALUES (DATE(NEW.created_at), COALESCE(NEW.priority, 'Medium'), COALESCE(NEW.status, 'Open'), COALESCE(NEW.assigned_to, 0), 1)
+        ON DUPLICATE KEY UPDATE total = total + 1;
+
+CREATE TRIGGER trg_tickets_rollup_upd AFTER UPDATE ON tickets
+    FOR EACH ROW INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+        SELECT * FROM (
+            SELECT DATE(OLD.created_at) AS day, COALESCE(OLD.priority, 'Medium') AS priority,
+                   COALESCE(OLD.status, 'Open') AS status, COALESCE(OLD.assigned_to, 0) AS agent_id, -1 AS delta
+            UNION ALL
+            SELECT DATE(NEW.created_at), COALESCE(NEW.priority, 'Medium'),
+                   COALESCE(NEW.status, 'Open'), COALESCE(NEW.assigned_to, 0), 1
+        ) AS d
+        WHERE NOT (
+            OLD.priority <=> NEW.priority AND OLD.status <=> NEW.status
+            AND OLD.assigned_to <=> NEW.assigned_to AND OLD.created_at <=> NEW.created_at
+        )
+        ON DUPLICATE KEY UPDATE total = ticket_daily_rollup.total + d.delta;
+
+CREATE TRIGGER trg_tickets_rollup_del AFTER DELETE ON tickets
+    FOR EACH ROW INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+        VALUES (DATE(OLD.created_at), COALESCE(OLD.priority, 'Medium'), COALESCE(OLD.status, 'Open'), COALESCE(OLD.assigned_to, 0), -1)
+        ON DUPLICATE KEY UPDATE total = total - 1;
+
+-- Backfill (afterwards the nightly job reconciles the last 90 days)
+INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+SELECT DATE(created_at), COALESCE(priority, 'Medium'), COALESCE(status, 'Open'), COALESCE(assigned_to, 0), COUNT(*)
+FROM tickets
+GROUP BY 1, 2, 3, 4;
@@ -0,0 +1,7 @@
+-- Notes timeline: "hide system activity" filter, newest first per ticket
+
+-- -----------------------------------------------------
+-- TICKET NOTES
+-- -----------------------------------------------------
+ALTER TABLE ticket_notes
+    ADD KEY idx_ticket_notes_ticket_system_created (ticket_id, is_system, created_at);
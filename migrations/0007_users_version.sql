@@ -0,0 +1,17 @@
+-- Version counter for cached role membership (notification fan-out)
+
+-- -----------------------------------------------------
+-- CONFIG VERSION: users
+-- -----------------------------------------------------
+INSERT IGNORE INTO config_versions (name, version) VALUES ('users', 1);
+
+-- 👥 Role membership changes reload the notification fan-out cache (app/utils/fanout.py)
+CREATE TRIGGER trg_users_version_ins AFTER INSERT ON users
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'users';
+
+CREATE TRIGGER trg_users_version_upd AFTER UPDATE ON users
+    FOR EACH ROW UPDATE config_versions SET version = version + 1
+        WHERE name = 'users' AND NOT (OLD.role <=> NEW.role);
+
+CREATE TRIGGER trg_users_version_del AFTER DELETE ON users
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'users';
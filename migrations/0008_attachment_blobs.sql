@@ -0,0 +1,26 @@
+-- Content-addressed attachment store: identical uploads are kept once
+
+-- -----------------------------------------------------
+-- ATTACHMENT BLOBS (CONTENT-ADDRESSED, ONE FILE PER sha256)
+-- -----------------------------------------------------
+CREATE TABLE IF NOT EXISTS attachment_blobs (
+    content_hash CHAR(64) NOT NULL,
+
+    -- 📁 Relative to the static folder: uploads/blobs/ab/cd/<sha256>.<ext>
+    file_path VARCHAR(255) NOT NULL,
+    file_type VARCHAR(50),
+    size_bytes INT UNSIGNED NOT NULL DEFAULT 0,
+
+    -- 🔗 Number of note_attachments rows using this file
+    ref_count INT UNSIGNED NOT NULL DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (content_hash)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- -----------------------------------------------------
+-- NOTE ATTACHMENTS (NULL content_hash = legacy per-note upload)
+-- -----------------------------------------------------
+ALTER TABLE note_attachments
+    ADD COLUMN content_hash CHAR(64) NULL AFTER note_id,
+    ADD KEY idx_note_attachments_hash (content_hash);
@@ -0,0 +1,7 @@
+-- Sender email prefix search on the dashboard (app/utils/ticket_search.py)
+
+-- -----------------------------------------------------
+-- TICKETS
+-- -----------------------------------------------------
+ALTER TABLE tickets
+    ADD KEY idx_tickets_email (email);
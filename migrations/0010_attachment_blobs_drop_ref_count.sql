@@ -0,0 +1,9 @@
+-- ref_count could not be kept right: note_attachments rows go away by
+-- FK cascade (ticket / note deletes), which fires no triggers. Count
+-- note_attachments by content_hash (idx_note_attachments_hash) instead.
+
+-- -----------------------------------------------------
+-- ATTACHMENT BLOBS
+-- -----------------------------------------------------
+ALTER TABLE attachment_blobs
+    DROP COLUMN ref_count;
@@ -42,8 +42,10 @@ CREATE TABLE tickets (
     -- 👤 Assigned Agent
     assigned_to INT NULL,
 
-    -- ⏱ SLA HOURS (High=24, Medium=48, Low=72)
+    -- ⏱ SLA (High=24, Medium=48, Low=72) — set by trg_tickets_sla_*
     sla_hours INT NOT NULL DEFAULT 72,
+    warn_at TIMESTAMP NULL,
+    due_at TIMESTAMP NULL,
 
     -- 🔔 Slack notification flag
     slack_notified TINYINT(1) NOT NULL DEFAULT 0,
@@ -52,16 +54,109 @@ CREATE TABLE tickets (
     message_id VARCHAR(255) UNIQUE,
 
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    updated_at TIMESTAMP NULL DEFAULT NULL ON UPDATE CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
 
     PRIMARY KEY (id),
 
+    -- 🔎 Dashboard search (MATCH ... AGAINST, same column order)
+    FULLTEXT KEY ft_tickets_search (ticket_code, email, description),
+
+    -- 📧 Sender email prefix search (email LIKE 'joel@vec%')
+    KEY idx_tickets_email (email),
+
+    -- ⏱ Overdue / SLA warning range scans (app/utils/sla.py)
+    KEY idx_tickets_status_due (status, due_at),
+    KEY idx_tickets_status_warn (status, warn_at),
+
+    -- 📋 Dashboard pages (keyset on created_at, id) per scope / status
+    KEY idx_tickets_created (created_at),
+    KEY idx_tickets_status_created (status, created_at),
+    KEY idx_tickets_assigned_status_created (assigned_to, status, created_at),
+
     CONSTRAINT fk_ticket_assigned_agent
         FOREIGN KEY (assigned_to)
         REFERENCES users(id)
         ON DELETE SET NULL
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- ⏱ The ONE place the SLA rule lives: deadlines follow priority
+CREATE TRIGGER trg_tickets_sla_ins BEFORE INSERT ON tickets
+    FOR EACH ROW SET
+        NEW.sla_hours = CASE NEW.priority WHEN 'High' THEN 24 WHEN 'Medium' THEN 48 ELSE 72 END,
+        NEW.due_at = COALESCE(NEW.created_at, NOW()) + INTERVAL NEW.sla_hours HOUR,
+        NEW.warn_at = COALESCE(NEW.created_at, NOW()) + INTERVAL NEW.sla_hours * 48 MINUTE;
+
+CREATE TRIGGER trg_tickets_sla_upd BEFORE UPDATE ON tickets
+    FOR EACH ROW SET
+        NEW.sla_hours = CASE NEW.priority WHEN 'High' THEN 24 WHEN 'Medium' THEN 48 ELSE 72 END,
+        NEW.due_at = NEW.created_at + INTERVAL NEW.sla_hours HOUR,
+        NEW.warn_at = NEW.created_at + INTERVAL NEW.sla_hours * 48 MINUTE;
+
+
+-- -----------------------------------------------------
+-- DAILY TICKET ROLLUP (CHARTS + TRENDS)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS ticket_daily_rollup;
+
+CREATE TABLE ticket_daily_rollup (
+    -- DATE(tickets.created_at)
+    day DATE NOT NULL,
+    priority ENUM('High','Medium','Low') NOT NULL,
+    status ENUM('Open','In Progress','Resolved') NOT NULL,
+
+    -- 👤 tickets.assigned_to (0 = unassigned: part of the primary key)
+    agent_id INT NOT NULL DEFAULT 0,
+
+    total INT NOT NULL DEFAULT 0,
+
+    PRIMARY KEY (day, priority, status, agent_id),
+    KEY idx_rollup_agent_day (agent_id, day)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 📊 Move each ticket between buckets as it changes (app/utils/rollup.py)
+CREATE TRIGGER trg_tickets_rollup_ins AFTER INSERT ON tickets
+    FOR EACH ROW INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+        VALUES (DATE(NEW.created_at), COALESCE(NEW.priority, 'Medium'), COALESCE(NEW.status, 'Open'), COALESCE(NEW.assigned_to, 0), 1)
+        ON DUPLICATE KEY UPDATE total = total + 1;
+
+CREATE TRIGGER trg_tickets_rollup_upd AFTER UPDATE ON tickets
+    FOR EACH ROW INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+        SELECT * FROM (
+            SELECT DATE(OLD.created_at) AS day, COALESCE(OLD.priority, 'Medium') AS priority,
+                   COALESCE(OLD.status, 'Open') AS status, COALESCE(OLD.assigned_to, 0) AS agent_id, -1 AS delta
+            UNION ALL
+            SELECT DATE(NEW.created_at), COALESCE(NEW.priority, 'Medium'),
+                   COALESCE(NEW.status, 'Open'), COALESCE(NEW.assigned_to, 0), 1
+        ) AS d
+        WHERE NOT (
+            OLD.priority <=> NEW.priority AND OLD.status <=> NEW.status
+            AND OLD.assigned_to <=> NEW.assigned_to AND OLD.created_at <=> NEW.created_at
+        )
+        ON DUPLICATE KEY UPDATE total = ticket_daily_rollup.total + d.delta;
+
+CREATE TRIGGER trg_tickets_rollup_del AFTER DELETE ON tickets
+    FOR EACH ROW INSERT INTO ticket_daily_rollup (day, priority, status, agent_id, total)
+        VALUES (DATE(OLD.created_at), COALESCE(OLD.priority, 'Medium'), COALESCE(OLD.status, 'Open'), COALESCE(OLD.assigned_to, 0), -1)
+        ON DUPLICATE KEY UPDATE total = total - 1;
+
+
+-- -----------------------------------------------------
+-- TICKET ID SEQUENCE (PREALLOCATED BY THE EMAIL LISTENER)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS ticket_sequence;
+
+CREATE TABLE ticket_sequence (
+    name VARCHAR(32) NOT NULL,
+
+    -- Next free tickets.id (reserved in blocks, so ticket_code is set on INSERT)
+    next_id INT NOT NULL,
+
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO ticket_sequence (name, next_id)
+SELECT 'tickets', COALESCE(MAX(id), 0) + 1 FROM tickets;
+
 
 -- -----------------------------------------------------
 -- NOTIFICATIONS TABLE (IN-APP)
@@ -77,6 +172,8 @@ CREATE TABLE notifications (
     is_read TINYINT(1) DEFAULT 0,
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    KEY idx_notifications_user_read_created (user_id, is_read, created_at),
+
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE,
     FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -91,8 +188,15 @@ CREATE TABLE ticket_notes (
     ticket_id INT NOT NULL,
     user_id INT NOT NULL,
     note TEXT NOT NULL,
+
+    -- 🤖 Activity log entry (status/priority/assignment change)
+    is_system TINYINT(1) NOT NULL DEFAULT 0,
+
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    KEY idx_ticket_notes_ticket_created (ticket_id, created_at),
+    KEY idx_ticket_notes_ticket_system_created (ticket_id, is_system, created_at),
+
     FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE,
     FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
@@ -105,13 +209,272 @@ DROP TABLE IF EXISTS note_attachments;
 CREATE TABLE note_attachments (
     id INT AUTO_INCREMENT PRIMARY KEY,
     note_id INT NOT NULL,
+
+    -- 🔗 attachment_blobs.content_hash (NULL = legacy per-note upload)
+    content_hash CHAR(64) NULL,
     file_path VARCHAR(255) NOT NULL,
     file_type VARCHAR(50),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
 
+    KEY idx_note_attachments_hash (content_hash),
+
     FOREIGN KEY (note_id) REFERENCES ticket_notes(id) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 
+-- -----------------------------------------------------
+-- ATTACHMENT BLOBS (CONTENT-ADDRESSED, ONE FILE PER sha256)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS attachment_blobs;
+
+CREATE TABLE attachment_blobs (
+    content_hash CHAR(64) NOT NULL,
+
+    -- 📁 Relative to the static folder: uploads/blobs/ab/cd/<sha256>.<ext>
+    file_path VARCHAR(255) NOT NULL,
+    file_type VARCHAR(50),
+    size_bytes INT UNSIGNED NOT NULL DEFAULT 0,
+
+    -- 🔗 Users: note_attachments rows with the same content_hash
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (content_hash)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- -----------------------------------------------------
+-- EMAIL INGEST CHECKPOINTS (ONE ROW PER MAILBOX)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS ingest_checkpoints;
+
+CREATE TABLE ingest_checkpoints (
+    mailbox VARCHAR(255) NOT NULL,
+
+    -- 📬 IMAP UIDs are only valid within one UIDVALIDITY
+    uidvalidity BIGINT UNSIGNED NOT NULL,
+    last_uid BIGINT UNSIGNED NOT NULL DEFAULT 0,
+
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (mailbox)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- -----------------------------------------------------
+-- CONFIG VERSION COUNTERS (IN-PROCESS CACHE INVALIDATION)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS config_versions;
+
+CREATE TABLE config_versions (
+    name VARCHAR(64) NOT NULL,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (name)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO config_versions (name, version) VALUES
+    ('sender_allowlist', 1),
+    ('priority_keywords', 1),
+    ('users', 1);
+
+-- 👥 Role membership changes reload the notification fan-out cache (app/utils/fanout.py)
+CREATE TRIGGER trg_users_version_ins AFTER INSERT ON users
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'users';
+
+CREATE TRIGGER trg_users_version_upd AFTER UPDATE ON users
+    FOR EACH ROW UPDATE config_versions SET version = version + 1
+        WHERE name = 'users' AND NOT (OLD.role <=> NEW.role);
+
+CREATE TRIGGER trg_users_version_del AFTER DELETE ON users
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'users';
+
+
+-- -----------------------------------------------------
+-- SENDER ALLOWLIST (EMAIL LISTENER)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS sender_allowlist;
+
+CREATE TABLE sender_allowlist (
+    id INT NOT NULL AUTO_INCREMENT,
+
+    -- 'domain' also matches subdomains (mail.example.com)
+    kind ENUM('email','domain') NOT NULL,
+    value VARCHAR(255) NOT NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_sender_allowlist (kind, value)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 🔄 Any edit bumps the version → listener reloads without restart
+CREATE TRIGGER trg_sender_allowlist_ins AFTER INSERT ON sender_allowlist
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'sender_allowlist';
+
+CREATE TRIGGER trg_sender_allowlist_upd AFTER UPDATE ON sender_allowlist
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'sender_allowlist';
+
+CREATE TRIGGER trg_sender_allowlist_del AFTER DELETE ON sender_allowlist
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'sender_allowlist';
+
+INSERT INTO sender_allowlist (kind, value) VALUES
+    ('email', 'specialedflint@gmail.com'),
+    ('email', 'joel@vecchio-law.com'),
+    ('email', 'grandelaw@live.com'),
+    ('email', 'mhumble@rhodes-humble.com'),
+    ('domain', 'kplitigators.com'),
+    ('domain', 'kksblaw.com'),
+    ('domain', 'aavlawfirm.com'),
+    ('domain', 'grittonlaw.com'),
+    ('domain', 'brandpeters.com'),
+    ('domain', 'kahnlawfirm.com'),
+    ('domain', 'madialawfirm.com'),
+    ('domain', 'foleygriffin.com'),
+    ('domain', 'morganbourque.com'),
+    ('domain', 'woodlandsattorneys.com'),
+    ('domain', 'tedfordlaw.com'),
+    ('domain', 'texascountrytitle.com'),
+    ('domain', 'shanehinch.com'),
+    ('domain', 'fortheworkers.com'),
+    ('domain', 'ufkeslaw.com'),
+    ('domain', 'webbstokessparks.com'),
+    ('domain', 'amatteroflaw.com'),
+    ('domain', 'edwardflintlawyer.com'),
+    ('domain', 'jdsmithlaw.com'),
+    ('domain', 'adllaw.org'),
+    ('domain', 'davesautosarasota.com'),
+    ('domain', 'longwelllawyers.com'),
+    ('domain', 'perniklaw.com'),
+    ('domain', 'vecchio-law.com'),
+    ('domain', 'vecchioinjurylaw.com'),
+    ('domain', 'rhodes-humble.com'),
+    ('domain', 'awclawyer.com'),
+    ('domain', 'fresnodefense.com'),
+    ('domain', 'nh-lawyers.com'),
+    ('domain', 'kaleitalawfirm.com'),
+    ('domain', 'juliolawfirm.com'),
+    ('domain', 'skierlawfirm.com'),
+    ('domain', 'mccormackpc.com'),
+    ('domain', 'snowlawfirm.com'),
+    ('domain', 'grandelaw.com'),
+    ('domain', 'frederickslaw.net'),
+    ('domain', 'caworkinjurylaw.com'),
+    ('domain', 'nathanmillerlaw.com'),
+    ('domain', 'willislaw.com'),
+    ('domain', 'restivolaw.com'),
+    ('domain', 'lannenlawpllc.com');
+
+
+-- -----------------------------------------------------
+-- PRIORITY KEYWORDS (EMAIL LISTENER CLASSIFIER)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS priority_keywords;
+
+CREATE TABLE priority_keywords (
+    id INT NOT NULL AUTO_INCREMENT,
+
+    -- Case-insensitive substring of subject / body prefix
+    phrase VARCHAR(100) NOT NULL,
+    priority ENUM('High','Medium') NOT NULL,
+
+    -- A level wins once its matched weights add up to 1.0 (0 = disabled)
+    weight DECIMAL(5,2) NOT NULL DEFAULT 1.00,
+
+    -- NULL = all clients, otherwise overrides for that domain (+ subdomains)
+    client_domain VARCHAR(255) NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (id),
+    UNIQUE KEY uq_priority_keyword (phrase, client_domain)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TRIGGER trg_priority_keywords_ins AFTER INSERT ON priority_keywords
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'priority_keywords';
+
+CREATE TRIGGER trg_priority_keywords_upd AFTER UPDATE ON priority_keywords
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'priority_keywords';
+
+CREATE TRIGGER trg_priority_keywords_del AFTER DELETE ON priority_keywords
+    FOR EACH ROW UPDATE config_versions SET version = version + 1 WHERE name = 'priority_keywords';
+
+INSERT INTO priority_keywords (phrase, priority, weight) VALUES
+    ('urgent', 'High', 1.00),
+    ('asap', 'High', 1.00),
+    ('critical', 'High', 1.00),
+    ('important', 'Medium', 1.00),
+    ('soon', 'Medium', 1.00);
+
+
+-- -----------------------------------------------------
+-- OUTBOUND EMAIL QUEUE (SENT BY THE BACKGROUND SENDER)
+-- -----------------------------------------------------
+DROP TABLE IF EXISTS email_outbox;
+
+CREATE TABLE email_outbox (
+    id INT NOT NULL AUTO_INCREMENT,
+
+    recipient VARCHAR(255) NOT NULL,
+    subject VARCHAR(255) NOT NULL,
+    html MEDIUMTEXT NULL,
+    body MEDIUMTEXT NULL,
+    sender VARCHAR(255) NULL,
+
+    -- JSON object of extra headers (In-Reply-To, Auto-Submitted, ...)
+    headers TEXT NULL,
+
+    status ENUM('pending','sending','sent','failed') NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+
+    -- ⏱ Retry time (pending) or lease expiry (sending)
+    next_attempt_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    last_error VARCHAR(500) NULL,
+
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    sent_at TIMESTAMP NULL,
+
+    PRIMARY KEY (id),
+    KEY idx_email_outbox_due (status, next_attempt_at)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+
+-- -----------------------------------------------------
+-- SCHEMA MIGRATIONS (migrate.py)
+-- -----------------------------------------------------
+-- This file builds the CURRENT schema from scratch; existing databases
+-- are upgraded with migrations/NNNN_*.sql instead (python migrate.py).
+-- Add every new migration to BOTH places and to the list below.
+DROP TABLE IF EXISTS schema_migrations;
+
+CREATE TABLE schema_migrations (
+    version VARCHAR(255) NOT NULL,
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+
+    PRIMARY KEY (version)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+-- 🔁 Statements finished by a migration that failed halfway (resume point)
+DROP TABLE IF EXISTS schema_migration_progress;
+
+CREATE TABLE schema_migration_progress (
+    version VARCHAR(255) NOT NULL,
+    statements_done INT NOT NULL,
+
+    PRIMARY KEY (version)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+INSERT INTO schema_migrations (version) VALUES
+    ('0001_email_ingest'),
+    ('0002_email_outbox'),
+    ('0003_ticket_search_and_sla'),
+    ('0004_hot_query_indexes'),
+    ('0005_ticket_daily_rollup'),
+    ('0006_ticket_notes_system_index'),
+    ('0007_users_version'),
+    ('0008_attachment_blobs'),
+    ('0009_tickets_email_index'),
+    ('0010_attachment_blobs_drop_ref_count');
+
 
 -- -----------------------------------------------------
 -- OPTIONAL: SAMPLE VERIFIED ADMIN USER
@@ -0,0 +1,18 @@
+from app import create_app
+from app.utils.outbox import send_pending_emails
+import time
+
+app = create_app()
+
+print("📨 Outbox Worker running...")
+
+while True:
+    with app.app_context():
+        try:
+            sent = send_pending_emails()
+        except Exception as e:
+            print("⚠️ Outbox worker error:", e)
+            sent = 0
+
+    if not sent:
+        time.sleep(10)  # idle: poll every 10 seconds
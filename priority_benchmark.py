@@ -0,0 +1,88 @@
+import random
+import sys
+import time
+from app.utils.priority import priority_classifier
+
+# Micro-benchmark: old keyword scan vs PriorityClassifier.classify
+# (pure Python, no DB / IMAP needed)
+#   python priority_benchmark.py [emails] [rounds]
+
+EMAILS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+
+# ============================================================
+# OLD DETECTION (BEFORE THE CLASSIFIER)
+# ============================================================
+def detect_priority_old(subject, body):
+    text_data = f"{subject} {body}".lower()
+    if any(k in text_data for k in ["urgent", "asap", "critical"]):
+        return "High"
+    if any(k in text_data for k in ["important", "soon"]):
+        return "Medium"
+    return "Low"
+
+
+# ============================================================
+# CORPUS (SUPPORT-MAIL SHAPED, DETERMINISTIC)
+# ============================================================
+WORDS = (
+    "please help case client file the a to of and in we our your is "
+    "for with on can you attached document hearing deposition records "
+    "invoice portal login password update status request thanks regards "
+    "court filing deadline review motion settlement medical report"
+).split()
+
+KEYWORDS = ["urgent", "asap", "critical", "important", "soon"]
+
+SENDERS = ["paralegal@grandelaw.com", "intake@snowlawfirm.com", "ops@willislaw.com"]
+
+
+def make_corpus(n):
+    rng = random.Random(42)
+    corpus = []
+
+    for _ in range(n):
+        subject = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 9)))
+        body = " ".join(rng.choice(WORDS) for _ in range(rng.randint(40, 400)))
+
+        # ~1 in 4 emails mentions a keyword, often far down the body
+        if rng.random() < 0.25:
+            words = body.split()
+            words.insert(rng.randrange(len(words)), rng.choice(KEYWORDS))
+            body = " ".join(words)
+
+        # ~1 in 5 carries a long quoted thread / signature
+        if rng.random() < 0.2:
+            body += "\n\n> " + " ".join(rng.choice(WORDS) for _ in range(rng.randint(1000, 3000)))
+
+        corpus.append((subject, body, rng.choice(SENDERS)))
+
+    return corpus
+
+
+def bench(label, fn, corpus):
+    best = None
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        for subject, body, sender in corpus:
+            fn(subject, body, sender)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    print(f"{label:<12} {best * 1000:9.1f} ms  {best / len(corpus) * 1e6:7.2f} µs/email (best of {ROUNDS})")
+    return best
+
+
+corpus = make_corpus(EMAILS)
+size = sum(len(s) + len(b) for s, b, _ in corpus)
+print(f"Corpus: {len(corpus)} emails, {size / len(corpus) / 1024:.1f} KB avg")
+
+old = bench("old scan", lambda s, b, _: detect_priority_old(s, b), corpus)
+new = bench("classify", priority_classifier.classify, corpus)
+
+same = sum(
+    detect_priority_old(s, b) == priority_classifier.classify(s, b, sender)
+    for s, b, sender in corpus
+)
+print(f"Speedup: {old / new:.2f}x, same result for {same}/{len(corpus)} emails")
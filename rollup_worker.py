@@ -0,0 +1,46 @@
+from app import create_app
+from app.utils.rollup import reconcile_rollup
+from datetime import datetime, timedelta, timezone
+import sys
+import time
+
+# Nightly ticket_daily_rollup repair, for deployments where the in-app
+# scheduler doesn't run (gunicorn: it only starts under the dev reloader).
+# Triggers miss some changes (FK ON DELETE SET NULL on tickets.assigned_to),
+# so the rollup drifts without this.
+#
+#   python rollup_worker.py          run daily at 02:30 UTC
+#   python rollup_worker.py --once   run now and exit (cron: 30 2 * * *)
+
+RUN_AT_UTC = (2, 30)
+
+app = create_app()
+
+
+def run_once():
+    with app.app_context():
+        session = app.session()
+        try:
+            reconcile_rollup(session)
+        except Exception as e:
+            session.rollback()
+            print("⚠️ Rollup worker error:", e)
+            return False
+        finally:
+            session.close()
+    return True
+
+
+if "--once" in sys.argv[1:]:
+    sys.exit(0 if run_once() else 1)
+
+print("📊 Rollup Worker running...")
+
+while True:
+    now = datetime.now(timezone.utc)
+    next_run = now.replace(hour=RUN_AT_UTC[0], minute=RUN_AT_UTC[1], second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+
+    time.sleep((next_run - now).total_seconds())
+    run_once()
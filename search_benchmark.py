@@ -0,0 +1,80 @@
+import sys
+import time
+from sqlalchemy import text
+from app import create_app
+from app.utils.ticket_search import build_search
+
+# Benchmark: old dashboard search (LIKE '%x%' on code/email/description)
+# vs build_search (ticket code / email prefix / FULLTEXT), on the
+# configured database. Read-only: point it at a copy of production data.
+#   python search_benchmark.py [rounds] [term ...]
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+TERMS = sys.argv[2:] or ["printer jam", "invoice", "joel@vecchio", "TCK-00001", "ab"]
+
+PAGE_SIZE = 50  # DASHBOARD_PAGE_SIZE
+
+app = create_app()
+
+
+# ============================================================
+# THE TWO QUERIES (FIRST DASHBOARD PAGE)
+# ============================================================
+def old_query(term):
+    where = """
+        WHERE (
+            t.ticket_code LIKE :s
+            OR t.email LIKE :s
+            OR t.description LIKE :s
+        )
+    """
+    return "SELECT t.id FROM tickets t", where, "ORDER BY t.created_at DESC, t.id DESC", {"s": f"%{term}%"}
+
+
+def new_query(term):
+    clause, params, rank_sql = build_search(term)
+    if rank_sql:
+        return (
+            f"SELECT t.id, {rank_sql} AS relevance FROM tickets t",
+            f"WHERE 1=1 {clause}",
+            "ORDER BY relevance DESC, t.id DESC",
+            params,
+        )
+    return "SELECT t.id FROM tickets t", f"WHERE 1=1 {clause}", "ORDER BY t.created_at DESC, t.id DESC", params
+
+
+def bench(session, select, where, order, params):
+    sql = text(f"{select} {where} {order} LIMIT :limit")
+    params = dict(params, limit=PAGE_SIZE)
+
+    best = None
+    for _ in range(ROUNDS):
+        started = time.perf_counter()
+        rows = session.execute(sql, params).fetchall()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+
+    plan = session.execute(text(f"EXPLAIN {select} {where} {order} LIMIT :limit"), params).mappings().all()
+    examined = sum(row["rows"] or 0 for row in plan)
+    matches = session.execute(text(f"SELECT COUNT(*) FROM tickets t {where}"), params).scalar()
+
+    return best, len(rows), examined, matches
+
+
+with app.app_context():
+    session = app.session()
+    try:
+        total = session.execute(text("SELECT COUNT(*) FROM tickets")).scalar()
+        print(f"Tickets: {total}, first page of {PAGE_SIZE}, best of {ROUNDS}")
+        print(f"{'term':<16} {'query':<6} {'time':>10} {'page':>6} {'est. rows':>10} {'matches':>8}")
+
+        for term in TERMS:
+            results = {}
+            for label, build in (("old", old_query), ("new", new_query)):
+                best, page, examined, matches = bench(session, *build(term))
+                results[label] = best
+                print(f"{term:<16} {label:<6} {best * 1000:7.2f} ms {page:>6} {examined:>10} {matches:>8}")
+            print(f"{'':<16} speedup {results['old'] / results['new']:.1f}x")
+    finally:
+        session.rollback()
+        session.close()